@@ -1,19 +1,37 @@
 import streamlit as st
-import networkx as nx
 import pandas as pd
 import numpy as np
-from pyvis.network import Network
 import tempfile
 import os
-import google.generativeai as genai
 import time
 import re
-import random
+import logging
+import threading
 from dotenv import load_dotenv
 
-# Configure Google AI API
+# DAVIZ_* settings are read when the modules below are imported, so .env must be loaded first
 load_dotenv()  # Load environment variables from .env file
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))  # Replace with your actual API Key
+
+from ai_client import DEFAULT_BATCH_SIZE, build_feature_prompt, chunked, generate_batch, generate_text, iter_lines, stream_text
+from engine import build_dependency_entry, clean_feature_name, feature_graph_document, parse_feature_line
+from expansion import expand_concurrently
+from export import EXPORT_FORMATS, export_chunks, remove_stale_exports
+from graph_io import (
+    GRAPH_FILE_TYPES, GRAPH_FORMATS, document_dependencies, document_levels, document_reasons,
+    load_graph_document,
+)
+from ingest import file_digest
+from graph_view import DEFAULT_COLLAPSE_DEPTH, LARGE_GRAPH_NODES, DependencyGraph, dependency_levels, render_dependency_graph
+from parallel_generation import DEFAULT_WORKERS, export_parquet_shards
+from session_store import get_store, new_session_id
+from synthetic import DEFAULT_ROWS, DependencyCycleError, iter_synthetic_chunks
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Rerun latency budget: widget interactions that don't call the AI should finish well under this
+RERUN_BUDGET_MS = 500
+_rerun_started = time.perf_counter()
 
 # Initialize session state for AI beliefs, desires, intentions, and rewards
 if "beliefs" not in st.session_state:
@@ -55,54 +73,56 @@ def normalize_text(text):
     """ Normalize AI response by converting inconsistent spaces/tabs into a standard format. """
     return re.sub(r"\*\s{2,}", "* ", text)  # Replace extra spaces after asterisks with a single space
 
-def get_ai_dependencies(feature, full_context=None):
-    """ Fetch AI-generated dependencies while ensuring full hierarchical context. """
+def get_ai_dependencies(feature, full_context=None, on_dependency=None):
+    """ Fetch AI-generated dependencies while ensuring full hierarchical context.
+
+    When `on_dependency(name, reason)` is given the response is streamed and each
+    dependency is reported as soon as its line is complete.
+    """
     context_string = f" (for {full_context})" if full_context else ""
 
-    prompt = (
-        f"Identify at least **10-20 primary dependencies** for '{feature}{context_string}', ensuring they are **directly relevant**."
-        " Format each dependency as:\n"
-        "* **Dependency Name** – (Reason why it is a primary dependency)\n"
-        "\n"
-        "### Important Instructions:\n"
-        "1. **Focus Only on Primary Dependencies** – No secondary ones.\n"
-        f"2. **Ensure Relevance** – {feature} Dependencies must have a **strong logical connection** to the {context_string}.\n"
-        "3. **Avoid Generic Dependencies** – Must have a clear, well-explained purpose.\n"
-        "4. **Maintain Clarity & Structure** – Use precise technical terms.\n"
-        "\n"
-        "Proceed with generating the list."
-    )
+    prompt = build_feature_prompt(feature, full_context)
 
     try:
-        response = genai.GenerativeModel("gemini-2.0-flash").generate_content(prompt)
-        raw_output = response.text if response.text else "EMPTY RESPONSE"
-
-        if raw_output == "EMPTY RESPONSE":
+        if on_dependency is None:
+            response_text = generate_text(prompt)  # Served from the shared on-disk cache when available
+            response_lines = response_text.split("\n") if response_text else []
+        else:
+            response_lines = iter_lines(stream_text(prompt))
+
+        received_output = False
+        parsed_dependencies = []
+        for line in response_lines:
+            received_output = True
+            dependency = parse_feature_line(line)
+            if dependency:
+                parsed_dependencies.append(dependency)
+                if on_dependency is not None:
+                    on_dependency(*dependency)
+
+        if not received_output:
             st.warning(f"⚠️ AI did not return dependencies for {feature}. Using fallback values.")
             return {"Primary": [f"Placeholder Dependency {i+1} (for {feature}{context_string})" for i in range(5)]}, {}
 
-        primary_dependencies = []
-        explanations = {}
-
-        for line in raw_output.split("\n"):
-            line = line.strip()
-            match = re.match(r"^\*\s*\**(.+?)\**\s*\((.+?)\)$", line)
-            if match:
-                dependency_name, reason = match.groups()
-                full_dependency_name = f"{dependency_name} (for {feature}{context_string})"
-                primary_dependencies.append(full_dependency_name)
-                explanations[full_dependency_name] = reason.strip()
-
-        if len(primary_dependencies) < 10:
-            default_fallbacks = [f"Feature {i+1} (for {feature}{context_string})" for i in range(10 - len(primary_dependencies))]
-            primary_dependencies.extend(default_fallbacks)
-
-        return {"Primary": primary_dependencies[:20]}, explanations  # Trim to 20 max
+        return build_dependency_entry(feature, parsed_dependencies, context_string)
 
     except Exception as e:
         st.error(f"⚠️ AI Error: {e}")
         return {"Primary": [f"Error Handling (for {feature}{context_string})"]}, {}
 
+def get_ai_dependencies_batch(features):
+    """ Fetch dependencies for several features in one structured request, falling back to single calls. """
+    try:
+        parsed = generate_batch(features)
+    except Exception as e:
+        logger.warning("Batch AI error, falling back to single requests: %s", e)
+        parsed = {}
+
+    return {
+        feature: build_dependency_entry(feature, parsed[feature]) if feature in parsed else get_ai_dependencies(feature)
+        for feature in features
+    }
+
 # Initialize session state for dependencies
 if "dependencies" not in st.session_state:
     st.session_state.dependencies = {}
@@ -112,34 +132,164 @@ if "selected_dependencies" not in st.session_state:
     st.session_state.selected_dependencies = {}
 if "expanded_nodes" not in st.session_state:
     st.session_state.expanded_nodes = set()
+if "graph_model" not in st.session_state:
+    st.session_state.graph_model = DependencyGraph()  # Updated in place as dependencies are confirmed
+
+# 💾 Sessions are saved after every paid expansion; the URL carries the session id, so a refresh resumes it
+SESSION_APP = "ai"
+SESSION_STATE_DEFAULTS = {
+    "dependencies": dict, "explanations": dict, "selected_dependencies": dict, "expanded_nodes": set,
+    "beliefs": dict, "desires": dict, "intentions": dict, "rewards": dict,
+}
+SESSION_STATE_KEYS = tuple(SESSION_STATE_DEFAULTS)
+LAZY_SESSION_KEYS = ("dependencies", "explanations", "beliefs")  # Per-feature AI text, read from disk when needed
+
+def rebuild_graph_model():
+    graph_model = DependencyGraph()
+    for parent, children in st.session_state.selected_dependencies.items():
+        graph_model.set_children(parent, children)
+    st.session_state.graph_model = graph_model
+
+def reset_target_feature():
+    """ Show the loaded session's target in Step 1, so leftover text does not start a paid expansion in it. """
+    st.session_state.target_feature = next(iter(st.session_state.selected_dependencies), "")
+
+def save_session():
+    """ Write the entries that changed since the last save. """
+    title = next(iter(st.session_state.selected_dependencies), "Untitled session")
+    state = {name: st.session_state[name] for name in SESSION_STATE_KEYS}
+    get_store().save(st.session_state.session_id, SESSION_APP, title, state)
+    st.session_state.known_sessions.add(st.session_state.session_id)
+    st.query_params["session"] = st.session_state.session_id
+
+def resume_session(session_id):
+    """ Load a saved session into this one; returns False if it does not exist. """
+    state = get_store().load(session_id, lazy=LAZY_SESSION_KEYS)
+    if state is None:
+        return False
+    # Empty containers are not saved: anything missing is reset, not kept from the previous session
+    for name, default in SESSION_STATE_DEFAULTS.items():
+        st.session_state[name] = state[name] if name in state else default()
+    st.session_state.session_id = session_id
+    st.session_state.known_sessions.add(session_id)
+    st.query_params["session"] = session_id
+    rebuild_graph_model()
+    reset_target_feature()
+    return True
+
+# Only sessions opened in this browser tab are listed: the store is shared by every visitor
+if "known_sessions" not in st.session_state:
+    st.session_state.known_sessions = set()
+if "session_id" not in st.session_state:
+    requested_session = st.query_params.get("session")
+    if not (requested_session and resume_session(requested_session)):
+        st.session_state.session_id = new_session_id()
+
+with st.sidebar.expander("💾 Saved sessions"):
+    saved_sessions = get_store().list_sessions(SESSION_APP, st.session_state.known_sessions)
+    if saved_sessions:
+        chosen_session = st.selectbox(
+            "Resume a session",
+            saved_sessions,
+            format_func=lambda session: f"{session['title']} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(session['updated_at']))}",
+        )
+        if st.button("↩️ Resume") and chosen_session["id"] != st.session_state.session_id:
+            resume_session(chosen_session["id"])
+            st.rerun()
+    else:
+        st.caption("Sessions are saved here after each confirmed expansion.")
+
+# 🔹 Saved graphs (JSON, GraphML or edge list) restore the whole session without any AI calls
+def deferred_graph_document():
+    """ A callable building the session's dependency graph, with each selected dependency's explanation.
+
+    Downloads run it later on a thread without st.session_state, so the session's
+    containers are captured here, uncopied.
+    """
+    selected, dependencies, explanations = (
+        st.session_state.selected_dependencies, st.session_state.dependencies, st.session_state.explanations
+    )
+    return lambda: feature_graph_document(selected, dependencies, explanations)
+
+def restore_graph(document):
+    """ Replace the session's dependencies with a saved graph. """
+    dependencies = document_dependencies(document)
+    levels = document_levels(document)
+    reasons = document_reasons(document)
+    selected = {parent: children for parent, children in dependencies.items() if children or levels.get(parent) == 0}
+    st.session_state.selected_dependencies = selected
+    st.session_state.expanded_nodes = {parent for parent, children in selected.items() if children}
+    # Suggestions saved with the graph, or else the selections themselves (edge lists carry no state)
+    st.session_state.dependencies = document["state"].get("dependencies") or {parent: {"Primary": list(children)} for parent, children in selected.items()}
+    st.session_state.explanations = document["state"].get("explanations") or {
+        parent: {child: reasons[(parent, child)] for child in children if (parent, child) in reasons}
+        for parent, children in selected.items()
+    }
+    rebuild_graph_model()
+    reset_target_feature()
+    save_session()
+
+saved_graph = st.sidebar.file_uploader("📂 Load a saved graph", type=GRAPH_FILE_TYPES)
+if saved_graph is not None:
+    saved_digest = file_digest(saved_graph)
+    if st.session_state.get("loaded_graph_digest") != saved_digest:  # The uploader keeps its file across reruns
+        try:
+            restore_graph(load_graph_document(saved_graph.getvalue(), saved_graph.name))
+        except ValueError as e:
+            st.sidebar.error(f"⚠️ {e}")
+        else:
+            st.session_state.loaded_graph_digest = saved_digest
+            st.sidebar.success(f"Loaded {len(st.session_state.selected_dependencies)} features from {saved_graph.name}")
 
 # Main App
 st.title("🤖 AI-Powered Dynamic Dependency Analyzer")
 
 # Step 1: Enter Target Feature
 st.subheader("Step 1: Enter a Target Feature")
-target_feature = st.text_input("Enter the Target Feature (e.g., AI recruiter agent):")
+target_feature = st.text_input("Enter the Target Feature (e.g., AI recruiter agent):", key="target_feature")
+
+# Step 2: Select & Confirm Dependencies
+st.subheader("Step 2: Select & Expand Dependencies")
 
 if target_feature and target_feature not in st.session_state.dependencies:
-    deps, explanations = get_ai_dependencies(target_feature)
+    # Stream the first expansion so dependencies show up while the model is still generating
+    live_dependencies = st.empty()
+    streamed_lines = []
+
+    def show_streamed_dependency(dependency_name, reason):
+        base_feature_name = clean_feature_name(dependency_name)
+        cleaned_explanation = re.sub(r'\s*\(.*\)', '', reason).strip()
+        streamed_lines.append(f"- **{base_feature_name}**: {cleaned_explanation}")
+        live_dependencies.markdown("\n".join(streamed_lines))
+
+    deps, explanations = get_ai_dependencies(target_feature, on_dependency=show_streamed_dependency)
+    live_dependencies.empty()
     st.session_state.dependencies[target_feature] = deps
     st.session_state.explanations[target_feature] = explanations
     st.session_state.selected_dependencies[target_feature] = []
+    st.session_state.graph_model.add_node(target_feature)
 
     # ✅ Update BDI
     agent.update_beliefs(target_feature, deps)
     agent.refine_desires(target_feature)
+    save_session()
 
-# Step 2: Select & Confirm Dependencies
-st.subheader("Step 2: Select & Expand Dependencies")
-for parent, children in list(st.session_state.dependencies.items()):
-    st.write(f"### Dependencies for: {parent}")
+# Ask for several dependencies per AI request when expanding (falls back to one request per feature)
+batch_mode = st.sidebar.checkbox(
+    "⚡ Batch AI requests",
+    value=True,
+    help=f"Expand up to {DEFAULT_BATCH_SIZE} dependencies per AI call using structured output.",
+)
+
+def show_dependency_section(parent):
+    """ Suggestions, selection and confirm button of one feature. """
+    children = st.session_state.dependencies[parent]
 
     for category, items in children.items():
         if items:
             st.markdown(f"**🔹 {category} Dependencies:**")
             for item in items:
-                base_feature_name = re.sub(r'\*\*\s*–.*|\s*\(.*', '', item).strip()  # Clean up the item
+                base_feature_name = clean_feature_name(item)  # Clean up the item
                 explanation = st.session_state.explanations[parent].get(item, "No explanation provided.")
                 cleaned_explanation = re.sub(r'\s*\(.*\)', '', explanation).strip()  # Remove anything in parentheses
                 st.markdown(f"- **{base_feature_name}**: {cleaned_explanation}")
@@ -148,7 +298,7 @@ for parent, children in list(st.session_state.dependencies.items()):
     previous_selection = st.session_state.selected_dependencies.get(parent, [])
     filtered_selection = [item for item in previous_selection if item in valid_options]
 
-    base_feature_names = [re.sub(r'\*\*\s*–.*|\s*\(.*', '', item).strip() for item in valid_options]  # Extract only the feature name
+    base_feature_names = [clean_feature_name(item) for item in valid_options]  # Extract only the feature name
 
     selected = st.multiselect(
         f"Select dependencies for {parent}:",
@@ -167,55 +317,76 @@ for parent, children in list(st.session_state.dependencies.items()):
         with st.spinner("Updating AI beliefs, desires, and intentions..."):
             st.session_state.selected_dependencies[parent] = selected
             st.session_state.expanded_nodes.add(parent)
+            st.session_state.graph_model.set_children(parent, selected)  # Only this parent's edges change
 
             # Update AI Intentions after selection
             agent.update_intentions(parent, selected)
 
-            # Expand AI Dependencies
-            for item in selected:
-                if item not in st.session_state.dependencies:
-                    deps, explanations = get_ai_dependencies(item)
-                    st.session_state.dependencies[item] = deps
-                    st.session_state.explanations[item] = explanations
-
-                    # Update BDI
-                    agent.update_beliefs(item, deps)
-                    agent.refine_desires(item)
-
-            # Simulate loading of AI beliefs, desires, and intentions
-            time.sleep(2)  # Simulate a delay for loading data
+            # Expand AI Dependencies concurrently, merging each result as soon as it completes
+            pending_items = [item for item in selected if item not in st.session_state.dependencies]
+            if batch_mode:
+                jobs, fetch = chunked(pending_items), get_ai_dependencies_batch  # One structured request per batch
+            else:
+                jobs, fetch = [(item,) for item in pending_items], lambda job: {job[0]: get_ai_dependencies(job[0])}
+            script_ctx = get_script_run_ctx()
+            progress = st.progress(0.0, text=f"Expanding {len(pending_items)} dependencies...")
+            done_count = 0
+            for job, results, error in expand_concurrently(
+                jobs,
+                fetch,
+                initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx),
+            ):
+                for item in job:
+                    if error is not None:
+                        st.warning(f"⚠️ Could not expand {item}: {error}")
+                    else:
+                        deps, explanations = results[item]
+                        st.session_state.dependencies[item] = deps
+                        st.session_state.explanations[item] = explanations
+
+                        # Update BDI
+                        agent.update_beliefs(item, deps)
+                        agent.refine_desires(item)
+                    done_count += 1
+                    progress.progress(done_count / len(pending_items), text=f"Expanded {done_count}/{len(pending_items)}: {item}")
 
             # Display the updated BDI state
+            st.session_state.bdi_updated = True
+            save_session()
             st.success("AI beliefs, desires, and intentions updated successfully!")
 
-# Display Current BDI State
-# Display Current BDI State
-st.subheader("Current BDI State")
-
-# Create a placeholder for the BDI state
-bdi_placeholder = st.empty()
-
-# Display Beliefs
-with bdi_placeholder.container():
-    st.markdown("Beliefs")
-    for feature, deps in st.session_state.beliefs.items():
-        st.write(f"- **{feature}**: {', '.join(deps)}")
-
-    # Display Desires
-    st.markdown("Desires")
-    for feature, desire in st.session_state.desires.items():
-        st.write(f"- **{feature}**: {desire}")
-
-    # Display Intentions
-    st.markdown("Intentions")
-    for feature, intention in st.session_state.intentions.items():
-        st.write(f"- **{feature}**: {intention}")
+for parent in list(st.session_state.dependencies):
+    # Confirmed features start collapsed; a collapsed section never loads its saved suggestions
+    section = st.expander(
+        f"Dependencies for: {parent}", expanded=parent not in st.session_state.expanded_nodes,
+        key=f"section_{parent}", on_change="rerun",
+    )
+    if section.open:
+        with section:
+            show_dependency_section(parent)
 
-# Wait for 2 seconds before clearing the BDI state
-time.sleep(5)
+# Display Current BDI State
+# Collapsible panel: opens right after a confirm; while collapsed the (lazily saved) beliefs are not read
+if st.session_state.pop("bdi_updated", False):
+    st.session_state.bdi_panel = True
+bdi_panel = st.expander("Current BDI State", key="bdi_panel", on_change="rerun")
+if bdi_panel.open:
+    with bdi_panel:
+        # Display Beliefs
+        st.markdown("Beliefs")
+        for feature, deps in st.session_state.beliefs.items():
+            st.write(f"- **{feature}**: {', '.join(deps)}")
+
+        # Display Desires
+        st.markdown("Desires")
+        for feature, desire in st.session_state.desires.items():
+            st.write(f"- **{feature}**: {desire}")
+
+        # Display Intentions
+        st.markdown("Intentions")
+        for feature, intention in st.session_state.intentions.items():
+            st.write(f"- **{feature}**: {intention}")
 
-# Clear the BDI state
-bdi_placeholder.empty()
 # Add this function to adjust the zoom level
 if "zoom_level" not in st.session_state:
     st.session_state.zoom_level = 1.0 
@@ -224,7 +395,6 @@ if "zoom_level" not in st.session_state:
 
 # Function to set graph options
 import streamlit as st
-from pyvis.network import Network
 import tempfile
 import os
 
@@ -276,130 +446,158 @@ def set_graph_options(net):
     """
     net.set_options(options)
 
-# Function to recursively assign levels and ensure proper left-to-right expansion
-def add_node_with_level(net, node, level, added_nodes, node_levels):
-    if node not in added_nodes:
-        net.add_node(node, label=node, shape="box", size=30, color="lightblue", level=level)
-        added_nodes.add(node)
-        node_levels[node] = level
-
-    if node in st.session_state.selected_dependencies:
-        for child in st.session_state.selected_dependencies[node]:
-            if child not in added_nodes:
-                net.add_node(child, label=child, shape="box", size=20, color="lightgreen", level=level + 1)
-                added_nodes.add(child)
-                node_levels[child] = level + 1
-            
-            net.add_edge(node, child, color="darkblue", width=2.5)
-            # Recursively assign levels for deeper dependencies
-            add_node_with_level(net, child, level + 1, added_nodes, node_levels)
-
-# Function to generate the interactive left-to-right dependency graph
-def generate_interactive_graph():
+# Function to generate the interactive left-to-right dependency graph (standalone HTML for download)
+def generate_interactive_graph(selected_dependencies):
+    from pyvis.network import Network  # Only needed when the HTML export is downloaded
+
     net = Network(height="750px", width="100%", directed=True)
 
     set_graph_options(net)
 
-    if "selected_dependencies" not in st.session_state:
-        st.session_state.selected_dependencies = {}
-
-    added_nodes = set()
-    node_levels = {}
-
-    # Assign levels recursively to the graph structure
-    for parent in st.session_state.selected_dependencies.keys():
-        add_node_with_level(net, parent, level=0, added_nodes=added_nodes, node_levels=node_levels)
-
-    temp_dir = tempfile.gettempdir()
-    graph_path = os.path.join(temp_dir, "interactive_graph.html")
-    net.write_html(graph_path)
-
-    return graph_path
+    # One breadth-first pass: every feature is added once and every edge once, even in shared subtrees
+    node_levels, edges = dependency_levels(selected_dependencies)
+    for node, level in node_levels.items():
+        if level == 0:
+            net.add_node(node, label=node, shape="box", size=30, color="lightblue", level=level)
+        else:
+            net.add_node(node, label=node, shape="box", size=20, color="lightgreen", level=level)
+    for parent, child in edges:
+        net.add_edge(parent, child, color="darkblue", width=2.5)
+
+    return net.generate_html()
+
+# Live graph: stays mounted in the browser and is patched with only what changed since the last rerun
+if len(st.session_state.graph_model):
+    # 🗺️ Large graphs: server-side layout and collapsed deep subtrees (clusters expand on click)
+    large_col, collapse_col = st.columns(2)
+    with large_col:
+        large_graph = st.checkbox(
+            "🗺️ Large-graph mode",
+            value=len(st.session_state.graph_model) > LARGE_GRAPH_NODES,
+            help="Positions are computed on the server and deep subtrees are collapsed into clickable clusters.",
+        )
+    with collapse_col:
+        collapse_depth = st.number_input("Collapse below depth", min_value=1, value=DEFAULT_COLLAPSE_DEPTH, disabled=not large_graph)
+    render_dependency_graph(
+        st.session_state.graph_model, key="live_graph", height=550, large=large_graph, collapse_depth=int(collapse_depth)
+    )
 
-# Button to generate the graph
-if st.button("🔄 Generate Interactive Graph"):
-    graph_html = generate_interactive_graph()
-    with open(graph_html, "r", encoding="utf-8") as file:
-        st.components.v1.html(file.read(), height=550)
+    # The standalone HTML is only built when the download is requested
+    selected = st.session_state.selected_dependencies
+    st.download_button(
+        label="📥 Download Interactive Graph",
+        data=lambda: generate_interactive_graph(selected),
+        file_name="graph.html",
+        mime="text/html",
+    )
 
-# Button to download the graph
-if os.path.exists(tempfile.gettempdir() + "/interactive_graph.html"):
-    with open(tempfile.gettempdir() + "/interactive_graph.html", "rb") as file:
-        st.download_button(label="📥 Download Interactive Graph", data=file, file_name="graph.html", mime="text/html")
+    # 💾 Compact exports straight from the session (reload them from the sidebar)
+    graph_format_col, graph_download_col = st.columns(2)
+    with graph_format_col:
+        graph_format = st.selectbox("Graph file format", list(GRAPH_FORMATS))
+    graph_suffix, graph_mime, write_graph = GRAPH_FORMATS[graph_format]
+    graph_document = deferred_graph_document()
+    with graph_download_col:
+        st.download_button(
+            label=f"💾 Download graph ({graph_format})",
+            data=lambda: write_graph(graph_document()),
+            file_name=f"dependency_graph{graph_suffix}",
+            mime=graph_mime,
+        )
 
 # Step 4: Generate Synthetic Dataset
 st.subheader("Step 4: Generate Synthetic Dataset")
 
+PREVIEW_ROWS = 100
+
+rows_col, seed_col, format_col = st.columns(3)
+with rows_col:
+    dataset_rows = st.number_input("Rows to generate", min_value=1, value=DEFAULT_ROWS, step=100)
+with seed_col:
+    dataset_seed = st.number_input("Random seed", min_value=0, value=42, help="The same seed always produces the same dataset.")
+with format_col:
+    export_format = st.selectbox("File format", list(EXPORT_FORMATS))
+
+# ⚡ Very large datasets: shard the rows across processes, one Parquet part file per shard
+parallel_col, workers_col = st.columns(2)
+with parallel_col:
+    parallel_mode = st.checkbox(
+        "⚡ Parallel generation (zip of Parquet parts)",
+        help="Splits the rows across worker processes. The parts, read in order, equal the single-process dataset.",
+    )
+with workers_col:
+    parallel_workers = st.number_input("Worker processes", min_value=1, value=DEFAULT_WORKERS, disabled=not parallel_mode)
+
 if st.button("📄 Generate Dataset"):
     if not st.session_state.selected_dependencies:
         st.warning("⚠️ No dependencies selected. Please expand some dependencies first.")
     else:
-        # Extract all features and determine depth
-        feature_levels = {}  # {feature: depth}
-        def assign_depth(feature, depth=1):
-            if feature in feature_levels:
-                feature_levels[feature] = min(feature_levels[feature], depth)  # Store the smallest depth found
+        # Generate in chunks and stream each one straight to a temporary file (flat peak memory)
+        remove_stale_exports()  # Exports of sessions that were closed are only cleaned up here
+        total_rows = int(dataset_rows)
+        preview = []
+        generated = {"rows": 0}
+        progress = st.progress(0.0, text="Generating dataset...")
+
+        def track_chunk(chunk):
+            if not preview:
+                preview.append(chunk.head(PREVIEW_ROWS))
+            generated["rows"] += len(chunk)
+            progress.progress(generated["rows"] / total_rows, text=f"Generated {generated['rows']:,}/{total_rows:,} rows")
+
+        def track_shards(rows_done):
+            progress.progress(rows_done / total_rows, text=f"Generated {rows_done:,}/{total_rows:,} rows")
+
+        try:
+            if parallel_mode:
+                path, written_rows, seconds = export_parquet_shards(
+                    st.session_state.selected_dependencies, total_rows, seed=int(dataset_seed),
+                    workers=int(parallel_workers), on_shard=track_shards,
+                )
+                # The preview is the first block again, regenerated here (shards live in other processes)
+                preview = [chunk.head(PREVIEW_ROWS) for chunk in iter_synthetic_chunks(
+                    st.session_state.selected_dependencies, rows=total_rows, seed=int(dataset_seed), blocks=range(1)
+                )]
+                st.success(f"⚡ {written_rows:,} rows in {seconds:.1f} s ({written_rows / seconds:,.0f} rows/sec)")
             else:
-                feature_levels[feature] = depth
-            for dep in st.session_state.selected_dependencies.get(feature, []):
-                assign_depth(dep, depth + 1)
-
-        # Get all selected root features
-        root_features = list(st.session_state.selected_dependencies.keys())
-        for root in root_features:
-            assign_depth(root, 1)
-
-        # Extract all unique features
-        all_features = list(feature_levels.keys())
-
-        if not all_features:
-            st.warning("⚠️ No features available for dataset generation.")
+                path, written_rows = export_chunks(
+                    iter_synthetic_chunks(st.session_state.selected_dependencies, rows=total_rows, seed=int(dataset_seed)),
+                    export_format,
+                    on_chunk=track_chunk,
+                )
+        except ImportError as e:
+            st.error(f"⚠️ {e}")
+        except DependencyCycleError as e:
+            st.error(f"⚠️ {e}. Deselect one of these dependencies to generate a dataset.")
         else:
-            # First feature is the target variable
-            target_feature = root_features[0]
-
-            # Dictionary to store generated feature values
-            data = []
-
-            # Generate 100 rows of logical synthetic data
-            for _ in range(100):
-                row = {}
-
-                # Step 1: Generate Base Feature Values
-                base_values = {}
-                for feature in all_features:
-                    base_values[feature] = random.randint(50, 100)  # Initial random value (adjusted later)
-
-                # Step 2: Apply Dependency-Based Adjustments with Exponential Decay
-                for feature, dependencies in st.session_state.selected_dependencies.items():
-                    for dependent_feature in dependencies:
-                        if dependent_feature in base_values:
-                            depth = feature_levels.get(dependent_feature, 1)
-                            influence_factor = 1 / (1.5 ** (depth - 1))  # Exponential decay (higher depth = lower impact)
-                            base_values[dependent_feature] = max(0, min(100, base_values[feature] * influence_factor + random.randint(-5, 5)))
-
-                # Step 3: Assign values to dataset row
-                for feature in all_features:
-                    row[feature] = base_values[feature]
-
-                # Step 4: Compute Target Variable with Decayed Influence from Dependencies
-                if target_feature in all_features:
-                    relevant_features = [f for f in all_features if f in st.session_state.selected_dependencies.get(target_feature, [])]
-                    if relevant_features:
-                        row[target_feature] = sum(row[f] * (1 / (1.5 ** (feature_levels[f] - 1))) for f in relevant_features)  # Weighted avg with decay
-
-                data.append(row)
-
-            # Convert to DataFrame
-            df = pd.DataFrame(data)
-            st.write("### 📝 Generated Dataset")
-            st.dataframe(df)
-
-            # Provide CSV download
-            csv = df.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                label="📥 Download CSV",
-                data=csv,
-                file_name="synthetic_dataset.csv",
-                mime="text/csv"
-            )
\ No newline at end of file
+            if not written_rows:
+                os.remove(path)
+                st.warning("⚠️ No features available for dataset generation.")
+            else:
+                previous = st.session_state.get("synthetic_export")
+                if previous and os.path.exists(previous["path"]):
+                    os.remove(previous["path"])  # Only keep the latest export on disk
+                st.session_state.synthetic_export = {
+                    "path": path, "format": "Parquet parts (zip)" if parallel_mode else export_format,
+                    "rows": written_rows, "preview": preview[0],
+                }
+
+# The latest export stays downloadable across reruns; only a preview sample is rendered
+synthetic_export = st.session_state.get("synthetic_export")
+if synthetic_export and os.path.exists(synthetic_export["path"]):
+    suffix, _, mime = EXPORT_FORMATS.get(synthetic_export["format"], ("_parts.zip", None, "application/zip"))
+    st.write(f"### 📝 Generated Dataset ({synthetic_export['rows']:,} rows, first {len(synthetic_export['preview'])} shown)")
+    st.dataframe(synthetic_export["preview"])
+
+    with open(synthetic_export["path"], "rb") as file:
+        st.download_button(
+            label=f"📥 Download {synthetic_export['format']}",
+            data=file,
+            file_name=f"synthetic_dataset{suffix}",
+            mime=mime,
+        )
+
+# ⏱️ Measure this rerun so regressions (e.g. blocking sleeps) show up immediately
+rerun_ms = (time.perf_counter() - _rerun_started) * 1000
+st.session_state.last_rerun_ms = rerun_ms
+st.sidebar.caption(f"⏱️ Rerun time: {rerun_ms:.0f} ms (budget {RERUN_BUDGET_MS} ms)")
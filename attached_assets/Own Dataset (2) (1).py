@@ -1,117 +1,91 @@
 import streamlit as st
 import pandas as pd
-import networkx as nx
 import re
-import google.generativeai as genai
-from pyvis.network import Network
 import tempfile
 import os
 import numpy as np
 import random
+import time
+import logging
 
 
-# ✅ Configure Gemini API
+# ✅ Configure Gemini API (the Gemini client is set up by ai_client on the first model call)
 from dotenv import load_dotenv
 
-# Configure Google AI API
+# DAVIZ_* settings are read when the modules below are imported, so .env must be loaded first
 load_dotenv()  # Load environment variables from .env file
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
-# 🔹 Function to extract hierarchical dependencies from the dataset
-def extract_hierarchical_dependencies(df, target_feature, max_depth=3, threshold=0.2):
-    if target_feature not in df.columns:
-        return {}, {}
+from correlation_engine import extract_hierarchical_dependencies  # On-demand correlation rows (no dense p × p matrix)
+from columnar_cache import get_cache as get_columnar_cache
+from ingest import DEFAULT_CHUNK_ROWS, file_digest, ingest_chunks, iter_csv_chunks
+from rerun_cache import cache_data, cache_resource, show_rerun_savings, start_rerun
+from ai_client import DEFAULT_BATCH_SIZE, build_dataset_prompt, generate_batch, generate_text, iter_lines, stream_text
+from engine import build_dataset_entry, dataset_graph_document, parse_dataset_line
+from synthetic import DependencyCycleError, synthesize_columns
+from session_store import get_store, new_session_id
+from graph_io import GRAPH_FILE_TYPES, GRAPH_FORMATS, document_dependencies, document_levels, load_graph_document
+from graph_view import DEFAULT_COLLAPSE_DEPTH, GRAPH_OPTIONS, LARGE_GRAPH_NODES, DependencyGraph, render_dependency_graph, style_by_level
 
-    df_encoded = df.copy()
+logger = logging.getLogger(__name__)
 
-    # 🔹 Encode categorical features
-    categorical_cols = df_encoded.select_dtypes(include=['object', 'category']).columns.tolist()
-    for col in categorical_cols:
-        df_encoded[col] = pd.factorize(df_encoded[col])[0]
-
-    # 🔹 Compute correlation matrix
-    correlations = df_encoded.corr()
-    if target_feature not in correlations:
-        return {}, {}
-
-    # 🔹 Find Primary dependencies based on correlation threshold
-    corr_values = correlations[target_feature].abs()
-    threshold = max(corr_values.median(), threshold)  # Dynamic threshold
-    corr_values = corr_values[corr_values > threshold]
-
-    dependencies = {target_feature: []}
-    level_mapping = {target_feature: 0}
-
-    def find_dependencies(feature, current_depth):
-        if current_depth > max_depth or feature not in correlations:
-            return
-
-        sorted_features = correlations[feature].abs().sort_values(ascending=False)
-        related_features = sorted_features[sorted_features > threshold].index.tolist()[1:6]
-
-        for rel in related_features:
-            if rel not in dependencies:
-                dependencies[rel] = []
-                level_mapping[rel] = current_depth
-
-            dependencies[feature].append(rel)
-            find_dependencies(rel, current_depth + 1)
-
-    find_dependencies(target_feature, 1)
-    return dependencies, level_mapping
 # 🔹 Function to fetch AI-based dependencies
 def normalize_text(text):
     return re.sub(r"\*\s{2,}", "* ", text)
 
 # 🔹 Function to fetch AI-based dependencies dynamically based on the dataset feature context
 # Fetch AI-based dependencies dynamically
-def get_ai_dependencies(feature, dataset_features):
-    # Build a dynamic context from the dataset features
-    feature_context = ', '.join(dataset_features)
-
-    prompt = (
-        f"Given the dataset with the following features: {feature_context}, "
-        "now drive the context of the dataset whats it referring to. "
-        f"list at least 10 to 20 primary dependencies for the feature '{feature}'. "
-        "These dependencies should be not the features in the dataset  but apart from that  which have a direct relationship or impact on the target feature. "
-        "Each dependency should be formatted as:\n"
-        "* **feature_name** (reason why it is a primary dependency)\n"
-        "Focus only on Primary dependencies—no secondary or tertiary ones. "
-        "Provide a diverse set of dependencies based on the context of these features, and ensure that they are logically related to each other."
-    )
+def get_ai_dependencies(feature, dataset_features, on_dependency=None):
+    prompt = build_dataset_prompt(feature, dataset_features)
 
     try:
-        # Query the AI model with the updated prompt
-        response = genai.GenerativeModel("gemini-2.0-flash").generate_content(prompt)
-        raw_output = response.text if response.text else "EMPTY RESPONSE"
-
-        print(f" AI Response for '{feature}':\n{raw_output}")  # Debugging Output
+        # Query the AI model (served from the shared on-disk cache when available).
+        # With `on_dependency(name, reason)` the response is streamed and parsed line by line.
+        if on_dependency is None:
+            response_text = generate_text(prompt)
+            response_lines = response_text.split("\n") if response_text else []
+        else:
+            response_lines = iter_lines(stream_text(prompt))
+
+        raw_lines = []
+        parsed_dependencies = []
+        for line in response_lines:
+            raw_lines.append(line)
+            dependency = parse_dataset_line(line)
+            if dependency:
+                parsed_dependencies.append(dependency)
+                if on_dependency is not None:
+                    on_dependency(*dependency)
+
+        raw_output = "\n".join(raw_lines) if raw_lines else "EMPTY RESPONSE"
+        logger.debug("AI response for %r:\n%s", feature, raw_output)
 
         if raw_output == "EMPTY RESPONSE":
             return {"Primary": [], "Explanations": {}}
 
-        primary_dependencies = []
-        explanations = {}
-
-        # Parse the raw response into dependencies and their explanations
-        for line in raw_output.split("\n"):
-            line = line.strip()
-            if line.startswith("*   **"):
-                match = re.match(r"\*\s*\*\*([^*]+)\*\*\s*\(([^)]+)\)", line)
-                if match:
-                    feature_name, reason = match.groups()
-                    primary_dependencies.append(feature_name.strip())
-                    explanations[feature_name.strip()] = reason.strip()
+        return build_ai_entry(feature, parsed_dependencies)
 
-        # Filter out dependencies that already exist
-        existing_dependencies = set(st.session_state.dependencies.get(feature, []))
-        new_primary_dependencies = [dep for dep in primary_dependencies if dep not in existing_dependencies]
+    except Exception as e:
+        st.warning(f" AI Error for '{feature}': {e}")
+        return {"Primary": [], "Explanations": {}}
 
-        return {"Primary": new_primary_dependencies[:20], "Explanations": explanations}
+# 🔹 Turn (dependency, reason) pairs into the {"Primary", "Explanations"} entry stored per feature
+def build_ai_entry(feature, parsed_dependencies):
+    # Filter out dependencies that already exist
+    return build_dataset_entry(parsed_dependencies, st.session_state.dependencies.get(feature, []))
 
+# 🔹 Fetch AI dependencies for several features in one structured request (dataset context sent once)
+def get_ai_dependencies_batch(features, dataset_features):
+    try:
+        parsed = generate_batch(features, dataset_features)
     except Exception as e:
-        print(f" AI Error: {e}")
-        return {"Primary": [], "Explanations": {}}
+        logger.warning("Batch AI error, falling back to single requests: %s", e)
+        parsed = {}
+
+    # Features the batch could not answer fall back to the single-feature prompt
+    return {
+        feature: build_ai_entry(feature, parsed[feature]) if feature in parsed else get_ai_dependencies(feature, dataset_features)
+        for feature in features
+    }
 
 # ✅ Initialize session state
 if "dependencies" not in st.session_state:
@@ -129,26 +103,147 @@ if "expanded_features" not in st.session_state:
 if "df" not in st.session_state:
     st.session_state.df = None
 
+start_rerun()
 st.title(" AI-Powered Dependency Analyzer (Dataset Mode)")
 
+# 🔹 Sessions are saved after every analysis and AI call; the URL carries the session id, so a refresh resumes it
+SESSION_APP = "dataset"
+SESSION_STATE_DEFAULTS = {
+    "dependencies": dict, "level_mapping": dict, "ai_dependencies": dict, "expanded_features": set, "graph_ready": bool,
+}
+SESSION_STATE_KEYS = tuple(SESSION_STATE_DEFAULTS)
+LAZY_SESSION_KEYS = ("ai_dependencies",)  # Per-feature AI suggestions, read from disk when a feature is selected
+
+def rebuild_graph_model():
+    st.session_state.graph_model = DependencyGraph.from_dependencies(
+        st.session_state.dependencies, st.session_state.get("level_mapping", {}),
+        node_style=style_by_level, edge_style={"color": "gray", "width": 2},
+    )
+
+def save_session():
+    level_mapping = st.session_state.get("level_mapping", {})
+    title = next((feature for feature, level in level_mapping.items() if level == 0), None) or next(iter(st.session_state.dependencies), "Untitled session")
+    state = {name: st.session_state[name] for name in SESSION_STATE_KEYS}
+    get_store().save(st.session_state.session_id, SESSION_APP, str(title), state)
+    st.session_state.known_sessions.add(st.session_state.session_id)
+    st.query_params["session"] = st.session_state.session_id
+
+def resume_session(session_id):
+    state = get_store().load(session_id, lazy=LAZY_SESSION_KEYS)
+    if state is None:
+        return False
+    # Empty containers are not saved: anything missing is reset, not kept from the previous session
+    for name, default in SESSION_STATE_DEFAULTS.items():
+        st.session_state[name] = state[name] if name in state else default()
+    st.session_state.session_id = session_id
+    st.session_state.known_sessions.add(session_id)
+    st.query_params["session"] = session_id
+    rebuild_graph_model()  # Never keep the previous session's graph
+    return True
+
+# Only sessions opened in this browser tab are listed: the store is shared by every visitor
+if "known_sessions" not in st.session_state:
+    st.session_state.known_sessions = set()
+if "session_id" not in st.session_state:
+    requested_session = st.query_params.get("session")
+    if not (requested_session and resume_session(requested_session)):
+        st.session_state.session_id = new_session_id()
+
+with st.sidebar.expander("💾 Saved sessions"):
+    saved_sessions = get_store().list_sessions(SESSION_APP, st.session_state.known_sessions)
+    if saved_sessions:
+        chosen_session = st.selectbox(
+            "Resume a session",
+            saved_sessions,
+            format_func=lambda session: f"{session['title']} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(session['updated_at']))}",
+        )
+        if st.button("↩️ Resume") and chosen_session["id"] != st.session_state.session_id:
+            resume_session(chosen_session["id"])
+            st.rerun()
+    else:
+        st.caption("Sessions are saved here after each analysis. Upload the dataset again to expand it.")
+
+# 🔹 Saved graphs (JSON, GraphML or edge list) restore the analysis without any AI calls
+def deferred_graph_document():
+    # Called later by downloads, on a thread without st.session_state: capture the containers now
+    dependencies, level_mapping, ai_dependencies = (
+        st.session_state.dependencies, st.session_state.level_mapping, st.session_state.ai_dependencies
+    )
+    return lambda: dataset_graph_document(dependencies, level_mapping, ai_dependencies)
+
+def restore_graph(document):
+    dependencies = document_dependencies(document)
+    level_mapping = document["state"].get("level_mapping") or document_levels(document)
+    st.session_state.dependencies = dependencies
+    st.session_state.level_mapping = level_mapping
+    st.session_state.ai_dependencies = document["state"].get("ai_dependencies", {})
+    st.session_state.expanded_features.update(dependencies)
+    st.session_state.graph_ready = True
+    rebuild_graph_model()
+    save_session()
+
+saved_graph = st.sidebar.file_uploader("📂 Load a saved graph", type=GRAPH_FILE_TYPES)
+if saved_graph is not None:
+    saved_digest = file_digest(saved_graph)
+    if st.session_state.get("loaded_graph_digest") != saved_digest:  # The uploader keeps its file across reruns
+        try:
+            restore_graph(load_graph_document(saved_graph.getvalue(), saved_graph.name))
+        except ValueError as e:
+            st.sidebar.error(f" {e}")
+        else:
+            st.session_state.loaded_graph_digest = saved_digest
+            st.sidebar.success(f"Loaded {len(st.session_state.dependencies)} features from {saved_graph.name}")
+
 # 🔹 Step 1: Upload Dataset
 uploaded_file = st.file_uploader(" Upload your dataset (CSV format)", type=["csv"])
 
+# 🔹 Parsed uploads and correlation engines survive reruns (keyed by file hash)
+# The CSV is parsed once into the columnar cache; later loads (other sessions, restarts) memory-map it
+@cache_resource("parsed CSV", max_entries=4)
+def load_dataset(digest, _uploaded_file):
+    cache = get_columnar_cache()
+    cache.ensure(digest, lambda: iter_csv_chunks(_uploaded_file))
+    return ingest_chunks(cache.iter_chunks(digest, chunk_rows=DEFAULT_CHUNK_ROWS))
+
+@cache_resource("correlations", max_entries=4)
+def load_correlation_engine(digest, dtype_name, _ingested):
+    return _ingested.correlation_engine(dtype=np.dtype(dtype_name))
+
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    # Chunked, compact-dtype parse; cached by file hash so reruns don't re-parse the upload
+    upload_digest = file_digest(uploaded_file)
+    ingested = load_dataset(upload_digest, uploaded_file)
+    df = ingested.df
     st.session_state.df = df
+    st.session_state.df_digest = upload_digest
     st.session_state.dataset_features = df.columns.tolist()
     st.write(" Dataset loaded successfully!")
+    if ingested.truncated:
+        st.info(f"Large file: keeping the first {len(df):,} of {ingested.total_rows:,} rows in memory. "
+                "Correlations are computed over all rows.")
 
     # 🔹 Step 2: User selects target feature
     target_feature = st.selectbox(" Select the Target Feature:", df.columns.tolist())
 
+    # Traversal limits and, for wide datasets, half the working memory of the correlation engine
+    depth_col, fan_out_col = st.columns(2)
+    with depth_col:
+        max_depth = st.slider("Maximum dependency depth", 1, 6, 3)
+    with fan_out_col:
+        fan_out = st.slider("Related features per node", 1, 15, 5)
+    low_memory = st.checkbox("Low-memory correlations (float32)", value=len(df.columns) > 1000)
+
     if st.button("🔍 Analyze Dataset-Based Dependencies"):
-        dependencies, level_mapping = extract_hierarchical_dependencies(df, target_feature)
+        dependencies, level_mapping = extract_hierarchical_dependencies(
+            df, target_feature, max_depth=max_depth, fan_out=fan_out,
+            engine=load_correlation_engine(upload_digest, "float32" if low_memory else "float64", ingested),
+        )
         st.session_state.dependencies = dependencies
         st.session_state.level_mapping = level_mapping
+        rebuild_graph_model()
         st.session_state.graph_ready = True
         st.session_state.expanded_features.add(target_feature)
+        save_session()
         st.success(" Dependency graph generated!")
 
 # 🔹 Function to render dependency graph
@@ -213,13 +308,18 @@ def get_color_by_level(level):
     return color_map.get(level, "lightgray")
 
 # 🔹 Function to render dependency graph
-def render_graph():
+# Cached by graph content: any change to the levels or dependency edges produces a new entry
+@cache_data("graph HTML", max_entries=16)
+def build_graph_html(level_items, dependency_items):
+    import networkx as nx  # Only needed when the HTML export is downloaded
+    from pyvis.network import Network
+
     G = nx.DiGraph()  # Use a directed graph for unidirectional edges
 
-    for node, level in st.session_state.level_mapping.items():
+    for node, level in level_items:
         G.add_node(node, level=level)
 
-    for parent, children in st.session_state.dependencies.items():
+    for parent, children in dependency_items:
         for child in children:
             G.add_edge(parent, child)  # Ensure directed edges
 
@@ -229,31 +329,55 @@ def render_graph():
     set_graph_options(net)
 
     for node in G.nodes:
-        level = G.nodes[node]['level']
+        level = G.nodes[node].get('level')  # Confirmed AI suggestions have no dataset level
         color = get_color_by_level(level)  # Get color based on level
         net.add_node(node, label=node, color=color, size=30, shape="box", title=node)  # Ensure nodes are boxes and set title for hover text
 
     for edge in G.edges:
         net.add_edge(edge[0], edge[1], color="gray", width=2)
 
-    # ✅ Safe file handling
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as temp_file:
-        temp_filename = temp_file.name  # Store filename before closing
-        net.save_graph(temp_filename)
+    return net.generate_html()
 
-    # ✅ Read and display the file safely
-    with open(temp_filename, "r", encoding="utf-8") as f:
-        html_content = f.read()
-        st.components.v1.html(html_content, height=600, scrolling=True)
+# Same hierarchy as the HTML export, with the larger node labels of this app
+DATASET_GRAPH_OPTIONS = dict(GRAPH_OPTIONS, nodes={"font": {"size": 20, "face": "Arial"}, "shape": "box", "margin": 15})
 
-    with open(temp_filename, "r") as f:
-        st.download_button("Download Graph as HTML", data=f, file_name="dependency_graph.html", mime="text/html")
+def render_graph():
+    # Live view patched with only the nodes/edges changed since the last rerun
+    # 🗺️ Large graphs: server-side layout and collapsed deep subtrees (clusters expand on click)
+    large_col, collapse_col = st.columns(2)
+    with large_col:
+        large_graph = st.checkbox(
+            "🗺️ Large-graph mode",
+            value=len(st.session_state.graph_model) > LARGE_GRAPH_NODES,
+            help="Positions are computed on the server and deep subtrees are collapsed into clickable clusters.",
+        )
+    with collapse_col:
+        collapse_depth = st.number_input("Collapse below depth", min_value=1, value=DEFAULT_COLLAPSE_DEPTH, disabled=not large_graph)
+    render_dependency_graph(
+        st.session_state.graph_model, key="dataset_graph", height=600, options=DATASET_GRAPH_OPTIONS,
+        large=large_graph, collapse_depth=int(collapse_depth),
+    )
 
-    # ✅ Delete file safely after rendering
-    try:
-        os.remove(temp_filename)
-    except PermissionError:
-        print(f" Warning: Could not delete temp file {temp_filename}. It may still be in use.")
+    # The standalone HTML is only built when the download is requested
+    level_items = tuple(st.session_state.level_mapping.items())
+    dependency_items = tuple((parent, tuple(children)) for parent, children in st.session_state.dependencies.items())
+    st.download_button(
+        "Download Graph as HTML",
+        data=lambda: build_graph_html(level_items, dependency_items),
+        file_name="dependency_graph.html",
+        mime="text/html",
+    )
+
+    # Compact exports straight from the session (reload them from the sidebar)
+    graph_format = st.selectbox("Graph file format", list(GRAPH_FORMATS))
+    graph_suffix, graph_mime, write_graph = GRAPH_FORMATS[graph_format]
+    graph_document = deferred_graph_document()
+    st.download_button(
+        f"Download Graph as {graph_format}",
+        data=lambda: write_graph(graph_document()),
+        file_name=f"dependency_graph{graph_suffix}",
+        mime=graph_mime,
+    )
 
 # Call render_graph() when the graph is ready
 if st.session_state.graph_ready:
@@ -265,15 +389,37 @@ if st.session_state.graph_ready:
     # After selecting the feature to expand
 # After selecting the feature to expand
 selected_feature = st.selectbox(" Select a feature to expand:", list(st.session_state.dependencies.keys()))
+batch_mode = st.sidebar.checkbox(
+    "⚡ Batch AI requests",
+    value=True,
+    help=f"Fetch suggestions for up to {DEFAULT_BATCH_SIZE} features per AI call using structured output.",
+)
 st.write("Selected Feature:", selected_feature)
 
 # Proceed with AI suggestion if a feature is selected
 if selected_feature:
     # Check if dependencies have already been loaded for the selected feature
     if selected_feature not in st.session_state.ai_dependencies:
-        # Pass both selected_feature and dataset_features to the AI function
-        ai_data = get_ai_dependencies(selected_feature, st.session_state.dataset_features)  # Fixed
-        st.session_state.ai_dependencies[selected_feature] = ai_data  # Store AI data
+        if batch_mode:
+            # Prefetch the other expandable features in the same request
+            unloaded = [f for f in st.session_state.dependencies if f not in st.session_state.ai_dependencies and f != selected_feature]
+            batch = [selected_feature] + unloaded[:DEFAULT_BATCH_SIZE - 1]
+            st.session_state.ai_dependencies.update(get_ai_dependencies_batch(batch, st.session_state.dataset_features))
+            save_session()
+        else:
+            # Stream the suggestions so each one shows up as soon as the model writes it
+            live_suggestions = st.empty()
+            streamed_lines = []
+
+            def show_streamed_dependency(dependency_name, reason):
+                streamed_lines.append(f"**{dependency_name}:** {reason}")
+                live_suggestions.markdown("\n\n".join(streamed_lines))
+
+            # Pass both selected_feature and dataset_features to the AI function
+            ai_data = get_ai_dependencies(selected_feature, st.session_state.dataset_features, on_dependency=show_streamed_dependency)
+            st.session_state.ai_dependencies[selected_feature] = ai_data  # Store AI data
+            save_session()
+            live_suggestions.empty()
 
     # Retrieve the AI-generated dependencies for the selected feature
     ai_dependency_data = st.session_state.ai_dependencies.get(selected_feature, {"Primary": []})
@@ -291,25 +437,34 @@ if selected_feature:
 
         if st.button(f" Confirm Dependencies for {selected_feature}"):
             if selected_suggestions:
-                # Adding selected suggestions to the existing dependencies
-                st.session_state.dependencies[selected_feature].extend(selected_suggestions)
+                # Adding selected suggestions to the existing dependencies (each edge stored once)
+                existing_children = set(st.session_state.dependencies[selected_feature])
+                st.session_state.dependencies[selected_feature].extend(
+                    dep for dep in selected_suggestions if dep not in existing_children
+                )
+                st.session_state.graph_model.add_children(selected_feature, selected_suggestions)
                 # Add selected suggestions to the expanded features so they can be used for future expansion
                 st.session_state.expanded_features.update(selected_suggestions)
                 # Also update the available features for expansion
                 st.session_state.graph_ready = True
                 st.success(f" Dependencies for '{selected_feature}' added!")
 
-                # Add the newly confirmed dependencies to the list for recursive expansion
-                st.session_state.dependencies[selected_feature].extend(selected_suggestions)
-
                 # **Update the select dropdown list to include newly added features**
                 st.session_state.dataset_features.extend(selected_suggestions)  # Add to the list of available features
 
+                save_session()
+
                 # Re-run the Streamlit app to update the UI with new dependencies
                 st.rerun()
     else:
         st.write("No AI-suggested dependencies available.")
 
+# 🔹 New columns follow their parents in the dependency graph; cached per dataset and dependency set
+@cache_resource("expanded dataset", max_entries=4)
+def build_expanded_dataset(digest, dependency_items, new_features, strength, _df):
+    generated = synthesize_columns(_df, dict(dependency_items), list(new_features), strength=strength, seed=0)
+    return pd.concat([_df, generated], axis=1)  # A new frame: the cached upload is never modified
+
 def generate_expanded_dataset():
     # Get the current dataset and the expanded features
     df = st.session_state.df
@@ -323,13 +478,20 @@ def generate_expanded_dataset():
     existing_columns = set(df.columns.tolist())
     
     # Filter out features that already exist in the dataset
-    new_features = [feature for feature in expanded_features if feature not in existing_columns]
-    
-    # Add only the new features to the dataset
-    for feature in new_features:
-        # Generate the data for the new feature based on its dependency level
-        # Placeholder function for generating feature values. You can modify this based on your logic.
-        df[feature] = np.random.uniform(0, 1, size=len(df))  # Replace with actual value generation logic
+    new_features = sorted((feature for feature in expanded_features if feature not in existing_columns), key=str)
+
+    # Generate all new features in one pass, each conditioned on the features it depends on
+    strength = st.slider("Dependency strength of generated features", 0.0, 0.95, 0.6, 0.05)
+    dependency_items = tuple(
+        (parent, tuple(children)) for parent, children in st.session_state.dependencies.items()
+    )
+    try:
+        df = build_expanded_dataset(
+            st.session_state.get("df_digest"), dependency_items, tuple(new_features), strength, df
+        )
+    except DependencyCycleError as e:
+        st.error(f"Cannot generate the expanded features: {e}")
+        st.stop()
 
     # Display the updated dataframe with the expanded features
     st.write("Updated Dataset with Expanded Features:")
@@ -359,3 +521,4 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+show_rerun_savings()
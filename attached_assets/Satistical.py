@@ -1,9 +1,18 @@
+import time
 import streamlit as st
 import pandas as pd
 import numpy as np
-import scipy.stats as stats
-import matplotlib.pyplot as plt
-import seaborn as sns
+from dotenv import load_dotenv
+
+load_dotenv()  # DAVIZ_* settings are read when the modules below are imported
+
+from ingest import file_digest
+from rerun_cache import cache_resource, show_rerun_savings, start_rerun
+from columnar_cache import get_cache as get_columnar_cache
+from stats_engine import (
+    DEFAULT_CHUNK_ROWS, STATISTICS, association_matrix, chi_square, contingency_table, iter_sheet_chunks,
+    pairwise_chi_square, profile_chunks,
+)
 
 # 🛠 Set Page Configuration (MUST BE FIRST)
 st.set_page_config(page_title="Excel Statistical Analysis", layout="wide")
@@ -22,58 +31,112 @@ TAILWIND_CSS = """
 st.markdown(TAILWIND_CSS, unsafe_allow_html=True)
 
 
+# 🔹 Uploads are parsed once into the columnar cache (keyed by file hash); later loads memory-map it
+def cache_upload(digest, uploaded_file):
+    cache = get_columnar_cache()
+    if digest not in cache:
+        with st.spinner("Converting the upload for fast reloads (once per file)..."):
+            cache.ensure(digest, lambda: iter_sheet_chunks(uploaded_file, uploaded_file.name))
+    return cache
+
+
+# 🔹 Column profiles survive reruns (keyed by file hash and the columns analyzed)
+# Every statistic of every chosen column in one chunked pass: picking a column or statistic is a lookup
+@cache_resource("column profile", max_entries=4)
+def load_profile(digest, columns):
+    return profile_chunks(get_columnar_cache().iter_chunks(digest, columns or None, chunk_rows=DEFAULT_CHUNK_ROWS))
+
+
+# Chi-square and Cramér's V of every pair of categorical columns, from the profile's factorized codes
+@cache_resource("pairwise chi-square", max_entries=4)
+def load_associations(digest, columns, _profile):
+    started = time.perf_counter()
+    results, skipped = pairwise_chi_square(_profile)
+    return results, skipped, time.perf_counter() - started
+
+
 def main():
+    start_rerun()
      # Navigation menu
     selected_page = st.sidebar.radio("Select Page", ["Statistical Analysis"])
 
     if selected_page == "Statistical Analysis":
         st.markdown('<h1 class="text-3xl font-bold text-gray-800 mb-4">Excel Statistical Analysis Tool</h1>', unsafe_allow_html=True)
         
-        uploaded_file = st.file_uploader(" Upload an Excel file", type=["xls", "xlsx"], help="Supports .xls and .xlsx formats")
+        uploaded_file = st.file_uploader(
+            " Upload an Excel file", type=["xls", "xlsx", "csv"], help="Supports .xls, .xlsx and .csv formats (.xlsx and .csv are read in chunks)"
+        )
         
         if uploaded_file is not None:
-            df = pd.read_excel(uploaded_file)
+            digest = file_digest(uploaded_file)
+            cache = cache_upload(digest, uploaded_file)
+            # Unselected columns are never read from the cached file
+            columns = tuple(st.multiselect(
+                "Columns to analyze", cache.columns(digest), placeholder="All columns",
+                help="Only the selected columns are loaded; leave empty to analyze every column",
+            ))
+            profile = load_profile(digest, columns)
             
             # Styled preview section
             st.markdown('<div class="p-4 bg-white shadow-md rounded-lg">', unsafe_allow_html=True)
             st.markdown('<h2 class="text-xl font-semibold text-gray-700">Preview of Uploaded Data</h2>', unsafe_allow_html=True)
-            st.dataframe(df.head())  
+            st.dataframe(profile.preview)  
+            st.caption(f"{profile.rows:,} rows · {len(profile.summary)} columns profiled")
             st.markdown('</div>', unsafe_allow_html=True)
 
-            numeric_columns = df.select_dtypes(include=np.number).columns.tolist()
-            categorical_columns = df.select_dtypes(include='object').columns.tolist()
+            numeric_columns = profile.numeric_columns
+            categorical_columns = profile.categorical_columns
 
             col1, col2 = st.columns(2)
             with col1:
                 selected_column = st.selectbox("Select a column for analysis", numeric_columns + categorical_columns)
             with col2:
-                stat_tool = st.selectbox("Select a statistical tool", [
-                    "Mean", "Median", "Mode", "Variance", "Standard Deviation", "Chi-Square Test", 
-                ])
+                stat_tool = st.selectbox("Select a statistical tool", [*STATISTICS, "Chi-Square Test"])
             
-            if stat_tool != "Chi-Square Test":
-                if st.button(" Calculate"):
-                    with st.container():
-                        st.markdown('<div class="p-4 bg-gray-100 rounded-lg">', unsafe_allow_html=True)
-                        if stat_tool == "Mean":
-                            st.success(f" Mean: {df[selected_column].mean()}")
-                        elif stat_tool == "Median":
-                            st.success(f" Median: {df[selected_column].median()}")
-                        elif stat_tool == "Mode":
-                            st.success(f" Mode: {df[selected_column].mode()[0]}")
-                        elif stat_tool == "Variance":
-                            st.success(f" Variance: {df[selected_column].var()}")
-                        elif stat_tool == "Standard Deviation":
-                            st.success(f" Standard Deviation: {df[selected_column].std()}")
-                        st.markdown('</div>', unsafe_allow_html=True)
+            if stat_tool != "Chi-Square Test" and selected_column is not None:
+                with st.container():
+                    st.markdown('<div class="p-4 bg-gray-100 rounded-lg">', unsafe_allow_html=True)
+                    value = profile.value(selected_column, stat_tool)
+                    if pd.isna(value):
+                        st.warning(f" {stat_tool} is not defined for '{selected_column}' (no numeric values).")
+                    else:
+                        st.success(f" {stat_tool}: {value}")
+                    st.markdown('</div>', unsafe_allow_html=True)
+
+                with st.expander("All statistics for every column"):
+                    st.dataframe(profile.summary.astype({"mode": "string"}))  # Modes mix numbers and text
             
             if stat_tool == "Chi-Square Test" and len(categorical_columns) >= 2:
-                cat_col1 = st.selectbox(" Select first categorical column", categorical_columns, key="chi1")
-                cat_col2 = st.selectbox(" Select second categorical column", categorical_columns, key="chi2")
-                if st.button("Run Chi-Square Test"):
-                    contingency_table = pd.crosstab(df[cat_col1], df[cat_col2])
-                    chi2, p, dof, expected = stats.chi2_contingency(contingency_table)
-                    st.success(f"Chi-Square Statistic: {chi2:.4f}, Degrees of Freedom: {dof}, P-Value: {p:.4f}")
+                chi_mode = st.radio("Pairs to test", ["Single pair", "All pairs"], horizontal=True)
+                if chi_mode == "Single pair":
+                    cat_col1 = st.selectbox(" Select first categorical column", categorical_columns, key="chi1")
+                    cat_col2 = st.selectbox(" Select second categorical column", categorical_columns, key="chi2")
+                    if st.button("Run Chi-Square Test"):
+                        table = contingency_table(
+                            profile.codes[cat_col1], profile.codes[cat_col2],
+                            len(profile.categories[cat_col1]), len(profile.categories[cat_col2]),
+                        )
+                        chi2, p, dof, cramers_v, _ = chi_square(table)
+                        st.success(f"Chi-Square Statistic: {chi2:.4f}, Degrees of Freedom: {dof}, P-Value: {p:.4f}, Cramér's V: {cramers_v:.4f}")
+                else:
+                    # 🔹 Screen every pair at once; the result is cached per file, so it is computed once
+                    if st.button(f"Run Chi-Square Test for all {len(categorical_columns) * (len(categorical_columns) - 1) // 2:,} pairs"):
+                        st.session_state.associations_key = (digest, columns)
+                    if st.session_state.get("associations_key") == (digest, columns):
+                        with st.spinner("Testing every pair of categorical columns..."):
+                            results, skipped, seconds = load_associations(digest, columns, profile)
+                        st.caption(f"{len(results):,} pair{'' if len(results) == 1 else 's'} tested in {seconds:.1f} s")
+                        if skipped:
+                            st.caption(f"Skipped (one category, or too many to tabulate): {', '.join(map(str, skipped))}")
+                        pairs_tab, matrix_tab = st.tabs(["Ranked pairs", "Association matrix (Cramér's V)"])
+                        with pairs_tab:
+                            max_p = st.number_input("Show pairs with p-value below", min_value=0.0, max_value=1.0, value=1.0, step=0.01)
+                            # Click a column header to sort
+                            st.dataframe(results[results["p_value"] <= max_p], hide_index=True)
+                        with matrix_tab:
+                            st.dataframe(association_matrix(results).round(3))
+
+    show_rerun_savings()
 
 
 
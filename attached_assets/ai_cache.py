@@ -0,0 +1,158 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# 🔹 Cache location and limits (override through .env)
+DEFAULT_CACHE_PATH = os.getenv(
+    "DAVIZ_AI_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ai_cache.sqlite3"),
+)
+DEFAULT_TTL_SECONDS = int(os.getenv("DAVIZ_AI_CACHE_TTL", 7 * 24 * 3600))  # One week
+DEFAULT_MAX_BYTES = int(os.getenv("DAVIZ_AI_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # 64 MB of responses
+
+
+def normalize_prompt(prompt):
+    """ Collapse whitespace so cosmetically different prompts share one cache entry. """
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def cache_key(model_name, prompt):
+    """ Content address of a (model, normalized prompt) pair. """
+    payload = f"{model_name}\x00{normalize_prompt(prompt)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """ SQLite-backed LLM response cache with TTL expiry and size-bounded LRU eviction. """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " hit_count INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the cache safe across Streamlit script threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, model_name, prompt):
+        """ Return the cached response text, or None on a miss or expired entry. """
+        key = cache_key(model_name, prompt)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                    (now, key),
+                )
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else row[0]
+
+    def set(self, model_name, prompt, response):
+        """ Store a response and evict least recently used entries beyond the size budget. """
+        if not response:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access, hit_count)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (cache_key(model_name, prompt), model_name, response, size, now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale_keys = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+    def get_or_generate(self, model_name, prompt, generate):
+        """ Serve from cache, otherwise call `generate(prompt)` and remember its text. """
+        cached = self.get(model_name, prompt)
+        if cached is not None:
+            return cached
+        response = generate(prompt)
+        self.set(model_name, prompt, response)
+        return response
+
+    def prewarm(self, model_name, prompts, generate):
+        """ Fill the cache for prompts that are not stored yet. Returns how many were generated. """
+        generated = 0
+        for prompt in prompts:
+            if self.get(model_name, prompt) is None:
+                self.set(model_name, prompt, generate(prompt))
+                generated += 1
+        return generated
+
+    def stats(self):
+        """ Hit/miss counters for this process plus the on-disk footprint. """
+        with self._connect() as conn:
+            entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": total_bytes,
+            }
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """ Process-wide cache instance shared by every app and session. """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
@@ -0,0 +1,359 @@
+import argparse
+import importlib
+import json
+import os
+import re
+import threading
+
+from ai_cache import cache_key, get_cache
+from llm_gateway import get_gateway
+
+MODEL_NAME = "gemini-2.0-flash"
+DEFAULT_BACKEND = os.getenv("DAVIZ_AI_BACKEND", "gemini")  # "stub" answers offline; "package.module:function" plugs in another model
+DEFAULT_BATCH_SIZE = int(os.getenv("DAVIZ_AI_BATCH_SIZE", 8))
+
+# 🔹 Structured output for batched prompts: one entry per requested feature
+BATCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "features": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "feature": {"type": "string"},
+                    "dependencies": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": {"type": "string"},
+                                "reason": {"type": "string"},
+                            },
+                            "required": ["name", "reason"],
+                        },
+                    },
+                },
+                "required": ["feature", "dependencies"],
+            },
+        },
+    },
+    "required": ["features"],
+}
+
+
+# 🔹 Prompt used by the AI-generated dataset app (free-text target feature)
+def build_feature_prompt(feature, full_context=None):
+    context_string = f" (for {full_context})" if full_context else ""
+    return (
+        f"Identify at least **10-20 primary dependencies** for '{feature}{context_string}', ensuring they are **directly relevant**."
+        " Format each dependency as:\n"
+        "* **Dependency Name** – (Reason why it is a primary dependency)\n"
+        "\n"
+        "### Important Instructions:\n"
+        "1. **Focus Only on Primary Dependencies** – No secondary ones.\n"
+        f"2. **Ensure Relevance** – {feature} Dependencies must have a **strong logical connection** to the {context_string}.\n"
+        "3. **Avoid Generic Dependencies** – Must have a clear, well-explained purpose.\n"
+        "4. **Maintain Clarity & Structure** – Use precise technical terms.\n"
+        "\n"
+        "Proceed with generating the list."
+    )
+
+
+# 🔹 Prompt used by the dataset app (feature taken from an uploaded CSV)
+def build_dataset_prompt(feature, dataset_features):
+    feature_context = ', '.join(dataset_features)
+    return (
+        f"Given the dataset with the following features: {feature_context}, "
+        "now drive the context of the dataset whats it referring to. "
+        f"list at least 10 to 20 primary dependencies for the feature '{feature}'. "
+        "These dependencies should be not the features in the dataset  but apart from that  which have a direct relationship or impact on the target feature. "
+        "Each dependency should be formatted as:\n"
+        "* **feature_name** (reason why it is a primary dependency)\n"
+        "Focus only on Primary dependencies—no secondary or tertiary ones. "
+        "Provide a diverse set of dependencies based on the context of these features, and ensure that they are logically related to each other."
+    )
+
+
+# 🔹 Prompt asking for the dependencies of several features in one structured (JSON) request
+def build_batch_prompt(features, dataset_features=None):
+    feature_list = "\n".join(f"- {feature}" for feature in features)
+    dataset_context = (
+        f"All features belong to a dataset with the following columns: {', '.join(dataset_features)}. "
+        "Dependencies must not be columns of this dataset but external factors with a direct impact on the feature.\n"
+        if dataset_features
+        else ""
+    )
+    return (
+        "For EACH of the following features, identify at least 10-20 primary dependencies that are directly relevant:\n"
+        f"{feature_list}\n"
+        f"{dataset_context}"
+        "Focus only on primary dependencies (no secondary or tertiary ones), avoid generic dependencies and use precise technical terms. "
+        "Give every dependency a short name and a one-sentence reason why it is a primary dependency. "
+        "Return one entry per feature, with the feature name copied exactly as listed above."
+    )
+
+
+def parse_batch_response(raw_output, features):
+    """ Split a batched JSON response into `{feature: [(dependency, reason), ...]}`.
+
+    Features missing from the response (or with no usable dependencies) are left out,
+    so the caller can fall back to single-feature prompts for them.
+    """
+    try:
+        entries = json.loads(raw_output).get("features", [])
+    except (ValueError, AttributeError):
+        return {}
+
+    wanted = {feature.strip().lower(): feature for feature in features}
+    parsed = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        feature = wanted.get(str(entry.get("feature", "")).strip().lower())
+        dependencies = [
+            (str(dep["name"]).strip(), str(dep["reason"]).strip())
+            for dep in entry.get("dependencies") or []
+            if isinstance(dep, dict) and dep.get("name") and dep.get("reason")
+        ]
+        if feature and dependencies:
+            parsed[feature] = dependencies
+    return parsed
+
+
+# 🔹 Gemini models, created once per model name and shared by every session and thread
+_gemini_models = {}
+_gemini_lock = threading.Lock()
+
+
+def _gemini_model(model_name):
+    """ The shared GenerativeModel; the SDK (slow to import) is loaded and given the API key on first use. """
+    with _gemini_lock:
+        if model_name not in _gemini_models:
+            import google.generativeai as genai
+
+            if not _gemini_models:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            _gemini_models[model_name] = genai.GenerativeModel(model_name)
+        return _gemini_models[model_name]
+
+
+def _request_options():
+    # The HTTP request itself gives up with the gateway's timeout, so a timed-out call does not linger on its thread
+    timeout = get_gateway().timeout
+    return {"timeout": timeout} if timeout and timeout > 0 else None
+
+
+def _gemini_call(prompt, model_name=MODEL_NAME, response_schema=None):
+    generation_config = None
+    if response_schema is not None:
+        generation_config = {"response_mime_type": "application/json", "response_schema": response_schema}
+    response = _gemini_model(model_name).generate_content(
+        prompt, generation_config=generation_config, request_options=_request_options()
+    )
+    return response.text
+
+
+def _gemini_stream(prompt, model_name=MODEL_NAME):
+    for chunk in _gemini_model(model_name).generate_content(prompt, stream=True, request_options=_request_options()):
+        yield chunk.text
+
+
+STUB_DEPENDENCIES = 12
+
+
+def _stub_call(prompt, model_name=MODEL_NAME, response_schema=None):
+    # Canned, deterministic answers in the formats the apps parse: no network, no API key
+    if response_schema is not None:
+        features = [line[2:] for line in prompt.splitlines() if line.startswith("- ")]
+        return json.dumps({"features": [
+            {"feature": feature, "dependencies": [
+                {"name": f"{feature} factor {i}", "reason": f"Reason {i}"} for i in range(STUB_DEPENDENCIES)
+            ]}
+            for feature in features
+        ]})
+    quoted = re.search(r"'([^']+)'", prompt)
+    feature = quoted.group(1) if quoted else "feature"
+    return "\n".join(f"*   **{feature} factor {i}** (Reason {i})" for i in range(STUB_DEPENDENCIES))
+
+
+def _stub_stream(prompt, model_name=MODEL_NAME):
+    text = _stub_call(prompt, model_name)
+    for start in range(0, len(text), 40):
+        yield text[start:start + 40]
+
+
+# 🔹 Model backends: {name: (call(prompt, model_name, response_schema), stream(prompt, model_name))}
+BACKENDS = {
+    "gemini": (_gemini_call, _gemini_stream),
+    "stub": (_stub_call, _stub_stream),
+}
+_backend = {"name": DEFAULT_BACKEND}
+
+
+def _load_backend(spec):
+    """ (call, stream) for "package.module:function"; a backend without streaming answers in one chunk. """
+    module_name, _, attr = spec.partition(":")
+    try:
+        call = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Unknown model backend '{spec}': {e}") from e
+    return call, lambda prompt, model_name=MODEL_NAME: iter([call(prompt, model_name)])
+
+
+def set_backend(name):
+    """ Route every model call (apps, CLI, cache pre-warming) to another backend. """
+    if name not in BACKENDS:
+        if ":" not in name:
+            raise ValueError(f"Unknown model backend '{name}' (choose from {', '.join(BACKENDS)} or package.module:function).")
+        BACKENDS[name] = _load_backend(name)
+    _backend["name"] = name
+
+
+def get_backend():
+    return _backend["name"]
+
+
+def configure(backend=None):
+    """ Select a backend and, for Gemini, read the API key from the environment or a .env file. """
+    set_backend(backend or DEFAULT_BACKEND)
+    if get_backend() == "gemini":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        with _gemini_lock:
+            _gemini_models.clear()  # The next call configures the SDK with the key just loaded
+
+
+def _current_backend():
+    name = _backend["name"]
+    if name not in BACKENDS:
+        set_backend(name)  # A "package.module:function" from DAVIZ_AI_BACKEND, imported on first use
+    return BACKENDS[name]
+
+
+def _call_model(prompt, model_name=MODEL_NAME, response_schema=None):
+    return _current_backend()[0](prompt, model_name, response_schema)
+
+
+def _stream_model(prompt, model_name=MODEL_NAME):
+    return _current_backend()[1](prompt, model_name)
+
+
+def _cache_model(model_name, response_schema=None):
+    # Answers of other backends never mix with Gemini's in the shared cache
+    if _backend["name"] != "gemini":
+        model_name = f"{_backend['name']}/{model_name}"
+    # Structured responses are cached apart from free-text ones for the same prompt
+    return f"{model_name}+json" if response_schema is not None else model_name
+
+
+def _gateway_call(prompt, model_name=MODEL_NAME, response_schema=None, cache=None):
+    # Rate-limited, retried and shared with identical calls in progress (see llm_gateway)
+    cache_model = _cache_model(model_name, response_schema)
+
+    def call():
+        response = _call_model(prompt, model_name, response_schema)
+        if cache is not None:  # Stored before waiting callers are released, so later ones hit the cache
+            cache.set(cache_model, prompt, response)
+        return response
+
+    if _backend["name"] == "stub":  # Canned offline answers have no quota to protect
+        return call()
+    return get_gateway().call(cache_key(cache_model, prompt), call)
+
+
+def generate_text(prompt, model_name=MODEL_NAME, use_cache=True, response_schema=None):
+    """ Return the model's text for a prompt, served from the shared response cache when possible. """
+    if not use_cache:
+        return _gateway_call(prompt, model_name, response_schema)
+    cache = get_cache()
+    cached = cache.get(_cache_model(model_name, response_schema), prompt)
+    return cached if cached is not None else _gateway_call(prompt, model_name, response_schema, cache)
+
+
+def stream_text(prompt, model_name=MODEL_NAME):
+    """ Yield the model's text chunk by chunk as it is generated.
+
+    A cache hit is replayed as a single chunk; a fresh response is stored once the
+    stream completes, so streamed and non-streamed calls share cache entries.
+    """
+    cache = get_cache()
+    cache_model = _cache_model(model_name)
+    cached = cache.get(cache_model, prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    def recorded_stream():
+        chunks = []
+        for text in _stream_model(prompt, model_name):
+            chunks.append(text)
+            yield text
+        cache.set(cache_model, prompt, "".join(chunks))
+
+    if _backend["name"] == "stub":
+        yield from recorded_stream()
+    else:
+        yield from get_gateway().stream(cache_key(cache_model, prompt), recorded_stream)
+
+
+def iter_lines(chunks):
+    """ Re-split streamed chunks into lines, yielding each line as soon as its newline arrives. """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+    if buffer:
+        yield buffer
+
+
+def generate_batch(features, dataset_features=None, model_name=MODEL_NAME):
+    """ Ask for the dependencies of several features in one call; see `parse_batch_response`. """
+    prompt = build_batch_prompt(features, dataset_features)
+    return parse_batch_response(generate_text(prompt, model_name, response_schema=BATCH_RESPONSE_SCHEMA), features)
+
+
+def chunked(items, size=DEFAULT_BATCH_SIZE):
+    """ Split items into consecutive batches of at most `size`. """
+    items = list(items)
+    return [tuple(items[i:i + size]) for i in range(0, len(items), max(1, size))]
+
+
+def prewarm(prompts, model_name=MODEL_NAME):
+    """ Generate and store responses for prompts that are not cached yet. """
+    return get_cache().prewarm(_cache_model(model_name), prompts, lambda p: _gateway_call(p, model_name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the shared Gemini response cache.")
+    parser.add_argument("features", nargs="*", help="Features to pre-warm the cache for")
+    parser.add_argument("--dataset", help="CSV whose columns give the dataset-mode context")
+    parser.add_argument("--stats", action="store_true", help="Print cache statistics")
+    parser.add_argument("--clear", action="store_true", help="Remove every cached response")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, help="Model backend: gemini, stub or package.module:function")
+    args = parser.parse_args()
+
+    if args.clear:
+        get_cache().clear()
+    if args.features:
+        configure(args.backend)
+        if args.dataset:
+            import pandas as pd
+
+            columns = pd.read_csv(args.dataset, nrows=0).columns.tolist()
+            prompts = [build_dataset_prompt(feature, columns) for feature in args.features]
+        else:
+            prompts = [build_feature_prompt(feature) for feature in args.features]
+        print(f"Pre-warmed {prewarm(prompts)} of {len(prompts)} prompts.")
+    if args.stats or not (args.clear or args.features):
+        for name, value in get_cache().stats().items():
+            print(f"{name}: {value}")
+        if args.features:  # Upstream traffic of this run
+            for name, value in get_gateway().stats().items():
+                print(f"gateway {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
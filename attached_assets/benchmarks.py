@@ -0,0 +1,470 @@
+""" Performance benchmarks for the DaviZ Streamlit apps.
+
+Run from this directory, e.g. `python benchmarks.py rerun`. Each benchmark prints its
+timings and exits non-zero when a regression budget is exceeded.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+AI_APP = os.path.join(HERE, "AI Genrated Dataset (3).py")
+OWN_APP = os.path.join(HERE, "Own Dataset (2) (1).py")
+STATS_APP = os.path.join(HERE, "Satistical.py")
+
+
+def _use_offline_model():
+    """ Point the apps at throwaway cache and session files and the canned "stub" model backend (no network, no API key). """
+    scratch = tempfile.mkdtemp()
+    os.environ["DAVIZ_AI_CACHE_PATH"] = os.path.join(scratch, "bench_cache.sqlite3")
+    os.environ["DAVIZ_SESSION_PATH"] = os.path.join(scratch, "bench_sessions.sqlite3")
+    sys.path.insert(0, HERE)
+    import ai_client
+
+    ai_client.set_backend("stub")
+
+
+def bench_rerun(args):
+    """ Median latency of widget-driven reruns of the AI-generated app. """
+    from streamlit.testing.v1 import AppTest
+
+    _use_offline_model()
+    at = AppTest.from_file(AI_APP, default_timeout=60)
+    at.run()
+    at.text_input[0].input("AI recruiter agent").run()
+    at.multiselect[0].select(at.multiselect[0].options[0])
+    at.button[0].click().run()
+
+    timings = []
+    for i in range(args.reruns):
+        started = time.perf_counter()
+        at.text_input[1].input(f"custom dependency {i}").run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    median_ms = statistics.median(timings)
+    print(f"rerun: median {median_ms:.0f} ms, max {max(timings):.0f} ms over {len(timings)} reruns (budget {args.budget_ms} ms)")
+    return median_ms <= args.budget_ms
+
+
+def _recursive_traversal(engine, target_feature, threshold, max_depth, fan_out):
+    """ The pre-BFS traversal: re-expands every reachable feature on every path. Returns (expansions, edges). """
+    counts = {"expansions": 0, "edges": 0}
+
+    def find_dependencies(feature, current_depth):
+        if current_depth > max_depth:
+            return
+        counts["expansions"] += 1
+        for rel in engine.top_related(feature, threshold, k=fan_out):
+            counts["edges"] += 1
+            find_dependencies(rel, current_depth + 1)
+
+    find_dependencies(target_feature, 1)
+    return counts["expansions"], counts["edges"]
+
+
+def bench_traversal(args):
+    """ Recursive vs breadth-first dependency traversal on a densely correlated dataset. """
+    import numpy as np
+    import pandas as pd
+
+    sys.path.insert(0, HERE)
+    from correlation_engine import CorrelationEngine, extract_hierarchical_dependencies
+
+    rng = np.random.default_rng(0)
+    shared = rng.normal(size=(args.rows, 1))
+    df = pd.DataFrame(
+        shared + 0.5 * rng.normal(size=(args.rows, args.columns)),  # Every column correlates with every other
+        columns=[f"feature_{i}" for i in range(args.columns)],
+    )
+    engine = CorrelationEngine(df)
+    threshold = max(np.nanmedian(np.abs(engine.row("feature_0"))), 0.2)
+
+    ok = True
+    for depth in range(2, args.max_depth + 1):
+        started = time.perf_counter()
+        expansions, edges = _recursive_traversal(engine, "feature_0", threshold, depth, args.fan_out)
+        recursive_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        dependencies, levels = extract_hierarchical_dependencies(df, "feature_0", max_depth=depth, fan_out=args.fan_out)
+        bfs_ms = (time.perf_counter() - started) * 1000
+        bfs_edges = sum(len(children) for children in dependencies.values())
+
+        print(
+            f"depth {depth}: recursive {expansions} expansions / {edges} edges in {recursive_ms:.1f} ms; "
+            f"BFS {len(dependencies)} features / {bfs_edges} edges in {bfs_ms:.1f} ms"
+        )
+        # Every correlated pair of the expanded features appears exactly once, never pointing to a shallower level
+        pairs = {frozenset((parent, child)) for parent, children in dependencies.items() for child in children}
+        expected = {
+            frozenset((feature, rel))
+            for feature, level in levels.items() if level < depth
+            for rel in engine.top_related(feature, threshold, k=args.fan_out) if rel != feature
+        }
+        ok = (
+            ok and bfs_edges == len(pairs) and pairs == expected
+            and all(levels[parent] <= levels[child] for parent, children in dependencies.items() for child in children)
+        )
+    return ok
+
+
+def _recursive_graph_walk(selected_dependencies):
+    """ The former `add_node_with_level` walk (recursing into every child, from every key); returns add_edge calls. """
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    added_nodes = set()
+    edge_calls = 0
+
+    def add_node_with_level(node, level):
+        nonlocal edge_calls
+        added_nodes.add(node)
+        for child in selected_dependencies.get(node, []):
+            added_nodes.add(child)
+            edge_calls += 1
+            add_node_with_level(child, level + 1)
+
+    for parent in selected_dependencies:
+        add_node_with_level(parent, 0)
+    return edge_calls
+
+
+def _diamond_dag(levels):
+    """ A chain of diamonds: top_i → left_i, right_i → top_(i+1), so paths double at every level. """
+    selected = {}
+    for i in range(levels):
+        selected[f"top_{i}"] = [f"left_{i}", f"right_{i}"]
+        selected[f"left_{i}"] = [f"top_{i + 1}"]
+        selected[f"right_{i}"] = [f"top_{i + 1}"]
+    selected[f"top_{levels}"] = []
+    return selected
+
+
+def bench_diamond(args):
+    """ Graph construction on diamond DAGs: former recursive walk vs single-pass BFS. """
+    sys.path.insert(0, HERE)
+    from graph_view import dependency_levels
+
+    ok = True
+    for levels in range(2, args.levels + 1, 2):
+        selected = _diamond_dag(levels)
+        unique_edges = sum(len(children) for children in selected.values())
+
+        recursive = ""
+        if levels <= args.max_recursive_levels:
+            started = time.perf_counter()
+            edge_calls = _recursive_graph_walk(selected)
+            recursive = f"recursive {edge_calls:,} add_edge calls in {(time.perf_counter() - started) * 1000:.1f} ms; "
+
+        started = time.perf_counter()
+        node_levels, edges = dependency_levels(selected)
+        bfs_ms = (time.perf_counter() - started) * 1000
+        print(f"{levels} levels ({len(selected)} nodes, {unique_edges} edges): {recursive}BFS {len(edges)} edges in {bfs_ms:.2f} ms")
+        ok = ok and len(edges) == unique_edges and node_levels[f"top_{levels}"] == 2 * levels
+    return ok
+
+
+def bench_graph_render(args):
+    """ Server-side cost and payload of the hierarchical vs large-graph views at 1k/10k nodes. """
+    import random
+
+    sys.path.insert(0, HERE)
+    from graph_view import CollapsedGraphView, DependencyGraph
+
+    ok = True
+    for size in args.nodes:
+        # Random layered DAG: every node after the root depends on 1-2 earlier nodes
+        rng = random.Random(0)
+        graph = DependencyGraph()
+        graph.add_node("node_0")
+        for i in range(1, size):
+            for parent in {rng.randrange(max(0, i - 50), i) for _ in range(rng.choice((1, 2)))}:
+                graph.add_children(f"node_{parent}", [f"node_{i}"])
+
+        started = time.perf_counter()
+        snapshot_bytes = len(json.dumps(graph.snapshot()))
+        snapshot_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        view = CollapsedGraphView(graph, collapse_depth=args.collapse_depth)
+        view.sync()
+        view_bytes = len(json.dumps(view.snapshot()))
+        view_ms = (time.perf_counter() - started) * 1000
+
+        cluster = next(record["expands"] for record in view.snapshot()["nodes"] if "expands" in record)
+        version = view.version
+        started = time.perf_counter()
+        view.expand(cluster)
+        view.sync()
+        expand_bytes = len(json.dumps(view.changes_since(version)))
+        expand_ms = (time.perf_counter() - started) * 1000
+
+        print(
+            f"{size:,} nodes: full snapshot {snapshot_bytes / 1024:.0f} KB in {snapshot_ms:.0f} ms "
+            f"(every node laid out by the browser); large-graph view {len(view.snapshot()['nodes'])} nodes, "
+            f"{view_bytes / 1024:.0f} KB in {view_ms:.0f} ms; expanding one cluster {expand_bytes / 1024:.1f} KB in {expand_ms:.0f} ms"
+        )
+        ok = ok and view_ms < args.budget_ms and view_bytes < snapshot_bytes
+    return ok
+
+
+def bench_sharded(args):
+    """ Rows/sec of sharded multi-process generation by worker count (parts must match one process). """
+    import pandas as pd
+
+    sys.path.insert(0, HERE)
+    from parallel_generation import generate_parquet_shards
+    from synthetic import iter_synthetic_chunks
+
+    # A wide, layered tree: 1 target, 10 features, 10 children each
+    selected = {"target": [f"f{i}" for i in range(10)]}
+    selected.update({f"f{i}": [f"f{i}_{j}" for j in range(10)] for i in range(10)})
+
+    ok = True
+    baseline = None
+    for workers in sorted({1, *range(2, args.max_workers + 1, 2), args.max_workers}):
+        with tempfile.TemporaryDirectory() as directory:
+            paths, rows, seconds = generate_parquet_shards(selected, args.rows, seed=0, workers=workers, directory=directory)
+            rate = rows / seconds
+            baseline = baseline or rate
+            print(f"{workers} workers: {rows:,} rows in {seconds:.2f} s = {rate:,.0f} rows/sec ({rate / baseline:.2f}x), {len(paths)} parts")
+            if workers == args.max_workers and args.rows <= 2_000_000:
+                parts = pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+                serial = pd.concat(list(iter_synthetic_chunks(selected, args.rows, seed=0)), ignore_index=True)
+                ok = ok and parts.equals(serial)
+    return ok
+
+
+def bench_columnar(args):
+    """ Reload time of an upload from the columnar cache versus parsing it again. """
+    import numpy as np
+    import pandas as pd
+
+    sys.path.insert(0, HERE)
+    from columnar_cache import ColumnarCache
+    from ingest import iter_csv_chunks
+
+    rng = np.random.default_rng(0)
+    columns = {f"x{i}": rng.normal(size=args.rows) for i in range(args.columns - 2)}
+    columns.update(group=rng.choice([f"g{i}" for i in range(50)], args.rows), label=rng.choice(["yes", "no"], args.rows))
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "upload.csv")
+        pd.DataFrame(columns).to_csv(csv_path, index=False)
+        cache = ColumnarCache(os.path.join(directory, "cache"))
+
+        started = time.perf_counter()
+        with open(csv_path, "rb") as file:
+            parsed = pd.concat(list(iter_csv_chunks(file)), ignore_index=True)
+        parse_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(csv_path, "rb") as file:
+            cache.store("upload", iter_csv_chunks(file))
+        convert_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        reloaded = cache.read("upload")
+        reload_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        projected = cache.read("upload", ["x0", "group"])
+        projected_s = time.perf_counter() - started
+
+        print(
+            f"{os.path.getsize(csv_path) / 1e6:,.0f} MB CSV: parse {parse_s:.2f} s, convert once {convert_s:.2f} s, "
+            f"reload {reload_s:.2f} s ({parse_s / reload_s:.0f}x), 2 columns {projected_s * 1000:.0f} ms"
+        )
+        same = reloaded.astype({"group": object, "label": object}).equals(parsed.astype({"group": object, "label": object}))
+        return same and projected.shape == (args.rows, 2) and reload_s < args.budget_s
+
+
+class _QuotaExceeded(Exception):
+    code = 429
+
+
+class _QuotaModel:
+    """ Simulated upstream model: fixed latency, at most `quota` calls started per second (429 beyond it). """
+
+    def __init__(self, quota, latency_s):
+        import threading
+
+        self.quota = quota
+        self.latency_s = latency_s
+        self.calls = 0
+        self._started = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self._lock:
+            now = time.monotonic()
+            self._started = [t for t in self._started if now - t < 1.0]
+            self.calls += 1
+            if len(self._started) >= self.quota:
+                raise _QuotaExceeded(f"Quota of {self.quota} calls/sec exceeded")
+            self._started.append(now)
+        time.sleep(self.latency_s)
+        return f"answer to {prompt}"
+
+
+def bench_gateway(args):
+    """ Sessions expanding the same popular features at once: direct cached calls versus calls through the gateway. """
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    os.environ.update(DAVIZ_LLM_RATE=str(args.quota), DAVIZ_LLM_BURST=str(args.quota), DAVIZ_LLM_TIMEOUT="10")
+    _use_offline_model()
+    import ai_client
+    from ai_cache import get_cache
+    from llm_gateway import get_gateway
+
+    def run(label, generate):
+        model = _QuotaModel(args.quota, args.latency_ms / 1000)
+        ai_client.BACKENDS[label] = (lambda prompt, model_name=None, response_schema=None: model(prompt), None)
+        ai_client.set_backend(label)
+        requests = [f"feature {i}" for i in range(args.features)] * args.sessions
+        random.Random(0).shuffle(requests)
+
+        def request(prompt):
+            try:
+                generate(prompt)
+                return True
+            except Exception:
+                return False  # The apps would show an "Error Handling" node
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            answered = sum(pool.map(request, requests))
+        seconds = time.perf_counter() - started
+        print(f"{label}: {answered}/{len(requests)} answered in {seconds:.2f} s, {model.calls} upstream calls")
+        return answered, len(requests), model.calls
+
+    # Before the gateway: every session that misses the shared cache calls the model itself
+    run("direct", lambda prompt: get_cache().get_or_generate("direct", prompt, ai_client._call_model))
+    answered, total, calls = run("gateway", ai_client.generate_text)
+    print("  " + ", ".join(f"{name} {value:.2f}" if isinstance(value, float) else f"{name} {value}" for name, value in get_gateway().stats().items()))
+    return answered == total and calls <= args.features * (1 + get_gateway().retries)
+
+
+# Modules the apps only need once a graph, model call or test is actually requested
+DEFERRED_MODULES = ["networkx", "pyvis", "google.generativeai", "scipy.stats", "matplotlib", "seaborn"]
+
+# Runs in a child under `python -X importtime`: imports after the marker line are the app's own
+_COLD_START_DRIVER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write("import time: -- app --\\n")
+sys.stderr.flush()
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+started = time.perf_counter()
+app.run()
+first = time.perf_counter() - started
+started = time.perf_counter()
+app.run()
+print(json.dumps({"first": first, "rerun": time.perf_counter() - started, "errors": [e.value for e in app.exception]}))
+"""
+
+
+def _app_imports(trace):
+    # {module: cumulative µs} of the imports started at the top level of the app run
+    imports = {}
+    started = False
+    for line in trace.splitlines():
+        if line.startswith("import time: -- app --"):
+            started = True
+        elif started and line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                imports[name.rstrip()] = int(cumulative)
+    return {name.strip(): us for name, us in imports.items() if not name.startswith("  ")}
+
+
+def bench_imports(args):
+    """ Cold start (first run, with its imports, traced by `-X importtime`) and next rerun of each app. """
+    import subprocess
+
+    _use_offline_model()
+    ok = True
+    for app in (AI_APP, OWN_APP, STATS_APP):
+        child = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _COLD_START_DRIVER, app],
+            capture_output=True, text=True, cwd=HERE, env=dict(os.environ, PYTHONWARNINGS="ignore"),
+        )
+        try:
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            print(f"{os.path.basename(app)}: failed\n{child.stderr[-2000:]}")
+            ok = False
+            continue
+        imports = _app_imports(child.stderr)
+        loaded = [module for module in DEFERRED_MODULES if any(name == module or name.startswith(module + ".") for name in imports)]
+        slowest = sorted(imports.items(), key=lambda item: -item[1])[:args.top]
+        print(
+            f"{os.path.basename(app)}: first run {result['first'] * 1000:.0f} ms "
+            f"(imports {sum(imports.values()) / 1000:.0f} ms), rerun {result['rerun'] * 1000:.0f} ms"
+        )
+        print("  slowest imports: " + ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in slowest))
+        print("  deferred modules loaded at start: " + (", ".join(loaded) or "none"))
+        ok = ok and not result["errors"] and not loaded and result["first"] * 1000 < args.budget_ms
+        if result["errors"]:
+            print("  errors: " + "; ".join(map(str, result["errors"])))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    rerun = subparsers.add_parser("rerun", help=bench_rerun.__doc__.strip())
+    rerun.add_argument("--reruns", type=int, default=10)
+    rerun.add_argument("--budget-ms", type=float, default=500)
+    rerun.set_defaults(run=bench_rerun)
+
+    traversal = subparsers.add_parser("traversal", help=bench_traversal.__doc__.strip())
+    traversal.add_argument("--rows", type=int, default=2000)
+    traversal.add_argument("--columns", type=int, default=60)
+    traversal.add_argument("--fan-out", type=int, default=5)
+    traversal.add_argument("--max-depth", type=int, default=7)
+    traversal.set_defaults(run=bench_traversal)
+
+    diamond = subparsers.add_parser("diamond", help=bench_diamond.__doc__.strip())
+    diamond.add_argument("--levels", type=int, default=20)
+    diamond.add_argument("--max-recursive-levels", type=int, default=20)
+    diamond.set_defaults(run=bench_diamond)
+
+    graph_render = subparsers.add_parser("graph-render", help=bench_graph_render.__doc__.strip())
+    graph_render.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000])
+    graph_render.add_argument("--collapse-depth", type=int, default=3)
+    graph_render.add_argument("--budget-ms", type=float, default=1000)
+    graph_render.set_defaults(run=bench_graph_render)
+
+    sharded = subparsers.add_parser("sharded", help=bench_sharded.__doc__.strip())
+    sharded.add_argument("--rows", type=int, default=2_000_000)
+    sharded.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    sharded.set_defaults(run=bench_sharded)
+
+    columnar = subparsers.add_parser("columnar", help=bench_columnar.__doc__.strip())
+    columnar.add_argument("--rows", type=int, default=2_000_000)
+    columnar.add_argument("--columns", type=int, default=20)
+    columnar.add_argument("--budget-s", type=float, default=1.0)
+    columnar.set_defaults(run=bench_columnar)
+
+    imports = subparsers.add_parser("imports", help=bench_imports.__doc__.strip())
+    imports.add_argument("--top", type=int, default=5)
+    imports.add_argument("--budget-ms", type=float, default=3000)
+    imports.set_defaults(run=bench_imports)
+
+    gateway = subparsers.add_parser("gateway", help=bench_gateway.__doc__.strip())
+    gateway.add_argument("--sessions", type=int, default=20)
+    gateway.add_argument("--features", type=int, default=10)
+    gateway.add_argument("--quota", type=int, default=10)
+    gateway.add_argument("--latency-ms", type=float, default=200)
+    gateway.set_defaults(run=bench_gateway)
+
+    args = parser.parse_args()
+    sys.exit(0 if args.run(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
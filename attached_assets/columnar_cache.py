@@ -0,0 +1,174 @@
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+# 🔹 Converted uploads location and size budget (override through .env)
+DEFAULT_CACHE_DIR = os.getenv(
+    "DAVIZ_COLUMNAR_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".daviz_columnar"),
+)
+DEFAULT_CACHE_BYTES = int(os.getenv("DAVIZ_COLUMNAR_BYTES", 4 * 1024 * 1024 * 1024))
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def _to_arrow(chunk):
+    # Columns pyarrow cannot type (Excel columns mixing numbers and text) are stored as text
+    arrays = []
+    for col in chunk.columns:
+        try:
+            arrays.append(pa.array(chunk[col], from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array([None if pd.isna(value) else str(value) for value in chunk[col]], type=pa.large_string()))
+    return pa.Table.from_arrays(arrays, names=[str(col) for col in chunk.columns])
+
+
+def _promoted_type(a, b):
+    if a == b or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_integer(a) and pa.types.is_integer(b):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (a, b)):
+        return pa.float64()  # As pandas does when a later chunk of an integer column has a gap
+    return pa.large_string()
+
+
+def _promoted_schema(schema, other):
+    return pa.schema([pa.field(field.name, _promoted_type(field.type, other.field(i).type)) for i, field in enumerate(schema)])
+
+
+class ColumnarCache:
+    """ Uploads converted once to uncompressed Arrow IPC (Feather v2) files, named by content hash.
+
+    Reloads memory-map the file, so they cost no parsing and no copy until a column
+    is turned into pandas, and read only the columns asked for. Least recently used
+    files are evicted once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, digest):
+        return os.path.join(self.directory, f"{digest}.arrow")
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def ensure(self, digest, make_chunks):
+        """ Convert a file unless it is cached already; `make_chunks()` returns its DataFrame chunks. """
+        with self._locks_guard:
+            lock = self._locks.setdefault(digest, threading.Lock())
+        with lock:  # Two reruns uploading the same file convert it once
+            if digest not in self:
+                self.store(digest, make_chunks())
+        return self.path(digest)
+
+    def store(self, digest, chunks):
+        """ Write DataFrame chunks as one Arrow file, one record batch per chunk; returns its path.
+
+        Column types are settled as chunks arrive: integers become floats if a later
+        chunk has gaps, and columns mixing types become text. The rare change of type
+        rewrites the batches written so far.
+        """
+        fd, current = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        schema = writer = None
+        try:
+            for chunk in chunks:
+                table = _to_arrow(chunk)
+                if schema is None:
+                    schema = table.schema
+                    writer = pa.ipc.new_file(current, schema)
+                elif table.schema != schema:
+                    promoted = _promoted_schema(schema, table.schema)
+                    if promoted != schema:
+                        writer.close()
+                        fd, rewritten = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+                        os.close(fd)
+                        writer = pa.ipc.new_file(rewritten, promoted)
+                        with pa.memory_map(current) as source:
+                            for batch in pa.ipc.open_file(source).read_all().cast(promoted).to_batches():
+                                writer.write_batch(batch)
+                        os.remove(current)
+                        current, schema = rewritten, promoted
+                    table = table.cast(schema)
+                writer.write_table(table)
+            if writer is None:  # No chunks at all: an empty file with no columns
+                writer = pa.ipc.new_file(current, pa.schema([]))
+            writer.close()
+            os.replace(current, self.path(digest))
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            os.remove(current)
+            raise
+        self.evict(keep={digest})
+        return self.path(digest)
+
+    def table(self, digest, columns=None):
+        """ The cached file as a memory-mapped Arrow table, projected to `columns` (raises KeyError if not cached). """
+        path = self.path(digest)
+        try:
+            source = pa.memory_map(path)
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        os.utime(path)  # Recently used files are evicted last
+        table = pa.ipc.open_file(source).read_all()  # Buffers point into the mapping: nothing is read yet
+        return table if columns is None else table.select(list(columns))
+
+    def columns(self, digest):
+        return self.table(digest).column_names
+
+    def read(self, digest, columns=None):
+        """ The cached file (or only `columns` of it) as a DataFrame. """
+        return self.table(digest, columns).to_pandas()
+
+    def iter_chunks(self, digest, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """ DataFrame chunks of at most `chunk_rows` rows; only one chunk is converted to pandas at a time. """
+        table = self.table(digest, columns)
+        if table.num_rows == 0:
+            yield table.to_pandas()
+            return
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            yield batch.to_pandas()
+
+    def evict(self, keep=()):
+        """ Delete least recently used files until the cache fits in `max_bytes`; returns how many were deleted. """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".arrow") and entry.name[:-len(".arrow")] not in keep:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith(".arrow"))
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)  # Open memory maps stay readable until they are closed
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """ Process-wide cache instance shared by every app and session. """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ColumnarCache()
+        return _shared_cache
@@ -0,0 +1,241 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def encode_features(df, dtype=np.float64):
+    """ Encode a frame as an (rows × columns) float matrix, factorizing categorical columns.
+
+    Columns that are neither numeric nor categorical (e.g. datetimes) are left out,
+    mirroring what `DataFrame.corr()` can use.
+    """
+    columns = []
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            arrays.append(series.to_numpy(dtype=dtype, na_value=np.nan))
+        elif (
+            pd.api.types.is_object_dtype(series)
+            or pd.api.types.is_string_dtype(series)
+            or isinstance(series.dtype, pd.CategoricalDtype)
+        ):
+            arrays.append(pd.factorize(series)[0].astype(dtype))
+        else:
+            continue
+        columns.append(col)
+
+    matrix = np.empty((len(df), len(columns)), dtype=dtype)
+    for i, values in enumerate(arrays):
+        matrix[:, i] = values
+    return matrix, columns
+
+
+class CorrelationEngine:
+    """ Pearson correlations computed one row at a time instead of as a dense p × p matrix.
+
+    Columns are centered and scaled once; each requested row is then a single
+    matrix-vector product (O(rows · columns)) and is memoized. Missing values use
+    pairwise-complete observations, like `DataFrame.corr()`.
+    """
+
+    def __init__(self, df, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        data, columns = encode_features(df, self.dtype)
+        self._set_columns(columns)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if not np.isnan(data).any():
+                data -= data.mean(axis=0)
+                norms = np.sqrt(np.einsum("ij,ij->j", data, data))
+                data /= np.where(norms > 0, norms, np.nan)  # Constant columns correlate as NaN
+                self._standardized = data
+                self._compute_row = self._dense_row
+            else:
+                self._valid = (~np.isnan(data)).astype(self.dtype)
+                data -= np.nanmean(data, axis=0)
+                np.nan_to_num(data, copy=False, nan=0.0)
+                self._centered = data
+                self._squared = data * data
+                self._compute_row = self._pairwise_row
+
+    @classmethod
+    def from_stats(cls, stats):
+        """ Engine backed by streamed sufficient statistics (see `CorrelationStats`) instead of raw rows. """
+        engine = cls.__new__(cls)
+        engine.dtype = np.dtype(np.float64)
+        engine._set_columns(stats.columns)
+        engine._compute_row = stats.correlation_row
+        return engine
+
+    def _set_columns(self, columns):
+        self.columns = list(columns)
+        self.index = {col: i for i, col in enumerate(self.columns)}
+        self._rows = {}
+
+    def __contains__(self, feature):
+        return feature in self.index
+
+    def row(self, feature):
+        """ Correlations of `feature` with every encoded column (memoized). """
+        if feature not in self._rows:
+            self._rows[feature] = np.clip(self._compute_row(self.index[feature]), -1.0, 1.0)
+        return self._rows[feature]
+
+    def _dense_row(self, j):
+        return self._standardized[:, j] @ self._standardized
+
+    def _pairwise_row(self, j):
+        x, valid_x = self._centered[:, j], self._valid[:, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            count = valid_x @ self._valid
+            sum_x = x @ self._valid
+            sum_xx = (x * x) @ self._valid
+            sum_y = valid_x @ self._centered
+            sum_yy = valid_x @ self._squared
+            sum_xy = x @ self._centered
+            cov = sum_xy - sum_x * sum_y / count
+            var_x = sum_xx - sum_x * sum_x / count
+            var_y = sum_yy - sum_y * sum_y / count
+            values = cov / np.sqrt(var_x * var_y)
+        values[count < 2] = np.nan
+        return values
+
+    def top_related(self, feature, threshold, k=5):
+        """ Features ranked by absolute correlation above `threshold`, skipping the strongest match (the feature itself). """
+        strengths = np.abs(self.row(feature))
+        candidates = np.flatnonzero(strengths > threshold)  # NaN compares False
+        if len(candidates) > k + 1:
+            best = np.argpartition(-strengths[candidates], k)[:k + 1]
+            candidates = candidates[best]
+        ordered = candidates[np.argsort(-strengths[candidates], kind="stable")]
+        return [self.columns[i] for i in ordered[1:k + 1]]
+
+
+class CorrelationStats:
+    """ Streaming sums, sums of squares and cross-products from which Pearson correlations follow.
+
+    Memory is O(columns²) regardless of how many rows are fed through `update`.
+    Values are shifted by the first chunk's means to limit cancellation. Once a
+    chunk contains missing values, per-pair counts and sums are kept as well so
+    correlations stay pairwise-complete.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.count = 0
+        self._shift = None
+        self._sum = np.zeros(p)
+        self._cross = np.zeros((p, p))
+        self._min = np.full(p, np.inf)
+        self._max = np.full(p, -np.inf)
+        self._pair_count = None  # Allocated on the first missing value
+
+    def update(self, matrix):
+        """ Accumulate a (rows × columns) float chunk; NaN marks a missing value. """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if len(matrix) == 0:
+            return
+        if self._shift is None:
+            with np.errstate(invalid="ignore"):
+                self._shift = np.nan_to_num(np.nanmean(matrix, axis=0)) if np.isnan(matrix).any() else matrix.mean(axis=0)
+        centered = matrix - self._shift
+        missing = np.isnan(centered)
+        with np.errstate(invalid="ignore"):
+            self._min = np.fmin(self._min, np.nanmin(matrix, axis=0, initial=np.inf))
+            self._max = np.fmax(self._max, np.nanmax(matrix, axis=0, initial=-np.inf))
+
+        if missing.any() and self._pair_count is None:
+            # Rows seen so far were complete: every pair shares all of them
+            p = len(self.columns)
+            self._pair_count = np.full((p, p), float(self.count))
+            self._pair_sum = np.repeat(self._sum[:, None], p, axis=1)
+            self._pair_sumsq = np.repeat(np.diag(self._cross)[:, None], p, axis=1)
+
+        if self._pair_count is None:
+            self._sum += centered.sum(axis=0)
+            self._cross += centered.T @ centered
+        else:
+            valid = (~missing).astype(np.float64)
+            centered[missing] = 0.0
+            self._pair_count += valid.T @ valid
+            self._pair_sum += centered.T @ valid
+            self._pair_sumsq += (centered * centered).T @ valid
+            self._sum += centered.sum(axis=0)
+            self._cross += centered.T @ centered
+        self.count += len(matrix)
+
+    def correlation_row(self, j):
+        """ Correlations of column `j` with every column. """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self._pair_count is None:
+                n = float(self.count)
+                sum_x, sum_y = self._sum[j], self._sum
+                sum_xx = self._cross[j, j]
+                sum_yy = np.diag(self._cross)
+            else:
+                n = self._pair_count[j]
+                sum_x, sum_y = self._pair_sum[j], self._pair_sum[:, j]
+                sum_xx, sum_yy = self._pair_sumsq[j], self._pair_sumsq[:, j]
+            cov = self._cross[j] - sum_x * sum_y / n
+            var_x = sum_xx - sum_x * sum_x / n
+            var_y = sum_yy - sum_y * sum_y / n
+            values = cov / np.sqrt(var_x * var_y)
+        values[np.broadcast_to(n, values.shape) < 2] = np.nan
+        # Constant columns have no correlation (their variance is only rounding noise)
+        constant = ~(self._max > self._min)
+        values[constant] = np.nan
+        if constant[j]:
+            values[:] = np.nan
+        return values
+
+
+def extract_hierarchical_dependencies(df, target_feature, max_depth=3, threshold=0.2, fan_out=5, dtype=np.float64, engine=None):
+    """ Correlation-driven dependency graph rooted at `target_feature`.
+
+    Breadth-first: every feature is expanded at most once, at its shallowest level.
+    Every correlated pair found is kept as one edge, including pairs on the same
+    level and pairs reaching back to a shallower feature. Correlation is symmetric,
+    so each edge points from the feature discovered first to the later one: the
+    result is acyclic and an A ↔ B pair is stored once.
+    Pass a prebuilt `engine` (e.g. from streamed statistics) to skip encoding `df`.
+    """
+    if df is not None and target_feature not in df.columns:
+        return {}, {}
+
+    if engine is None:
+        engine = CorrelationEngine(df, dtype=dtype)
+    if target_feature not in engine:
+        return {}, {}
+
+    # 🔹 Find Primary dependencies based on correlation threshold
+    threshold = max(np.nanmedian(np.abs(engine.row(target_feature))), threshold)  # Dynamic threshold
+
+    dependencies = {target_feature: []}
+    level_mapping = {target_feature: 0}
+    discovered = {target_feature: 0}  # Discovery order; levels never decrease along it
+    edges = set()
+    queue = deque([target_feature])
+
+    while queue:
+        feature = queue.popleft()
+        current_depth = level_mapping[feature] + 1
+        if current_depth > max_depth:
+            continue
+
+        for rel in engine.top_related(feature, threshold, k=fan_out):
+            if rel == feature:
+                continue
+            if rel not in level_mapping:
+                dependencies[rel] = []
+                level_mapping[rel] = current_depth
+                discovered[rel] = len(discovered)
+                queue.append(rel)
+            edge = (feature, rel) if discovered[feature] < discovered[rel] else (rel, feature)
+            if edge not in edges:
+                edges.add(edge)
+                dependencies[edge[0]].append(edge[1])
+
+    return dependencies, level_mapping
@@ -0,0 +1,466 @@
+""" Headless dependency analysis and dataset generation for batch jobs.
+
+The same pipeline as the two Streamlit apps, without a UI: a free-text target is
+expanded into an AI dependency tree (or a CSV column into a correlation tree with
+AI-suggested extra features), children are picked by a selection policy instead
+of a user, and the synthetic (or expanded) dataset is written next to a graph file
+the apps can load. Run `python engine.py features --help` or `python engine.py dataset --help`.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()  # DAVIZ_* settings are read when the modules below are imported
+
+import ai_client
+from ai_client import build_dataset_prompt, build_feature_prompt, chunked, generate_batch, generate_text
+from correlation_engine import extract_hierarchical_dependencies
+from expansion import DEFAULT_MAX_WORKERS, expand_concurrently
+from export import EXPORT_FORMATS, write_chunks
+from graph_io import build_graph_document, to_json
+from ingest import read_csv_chunked
+from parallel_generation import generate_parquet_shards
+from synthetic import DEFAULT_ROWS, iter_synthetic_chunks, synthesize_columns
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Response formats of the two prompts: "* **Name** – (reason)" and "*   **Name** (reason)"
+# A bold name may itself contain parentheses ("**Cost (USD)** – (reason)")
+FEATURE_DEPENDENCY_LINE = re.compile(r"^\*\s*(?:\*\*(.+?)\*\*|([^*(]+?))\s*(?:[–-]\s*)?\((.+)\)$")
+DATASET_DEPENDENCY_LINE = re.compile(r"\*\s*\*\*([^*]+)\*\*\s*\(([^)]+)\)")
+
+
+def parse_feature_line(line):
+    """ (dependency, reason) from one line of a free-text feature response, or None.
+
+    Names come out as batch responses give them ("**Name** – (reason)" yields "Name").
+    """
+    match = FEATURE_DEPENDENCY_LINE.match(line.strip())
+    if not match:
+        return None
+    bold, plain, reason = match.groups()
+    return (bold or plain).strip(), reason
+
+
+def parse_dataset_line(line):
+    """ (dependency, reason) from one line of a dataset-mode response, or None. """
+    line = line.strip()
+    match = DATASET_DEPENDENCY_LINE.match(line) if line.startswith("*   **") else None
+    return tuple(part.strip() for part in match.groups()) if match else None
+
+
+def clean_feature_name(item):
+    """ Dependency name without its "(for ...)" context or trailing reason; other parentheses are part of the name. """
+    return re.sub(r'\*\*\s*–.*|\s*\(for .*', '', item).strip()
+
+
+def explanations_by_name(entry, explanations):
+    """ {name: explanation} of one feature's suggestions, each looked up by the exact suggestion stored in `entry`. """
+    return {
+        clean_feature_name(item): explanations[item]
+        for items in entry.values() for item in items if explanations.get(item)
+    }
+
+
+def build_dependency_entry(feature, parsed_dependencies, context_string="", pad_to=10):
+    """ Turn (dependency, reason) pairs into the AI app's dependency list and explanations.
+
+    Lists shorter than `pad_to` are topped up with placeholder features, as the app shows them.
+    """
+    primary_dependencies = []
+    explanations = {}
+
+    for dependency_name, reason in parsed_dependencies:
+        full_dependency_name = f"{dependency_name} (for {feature}{context_string})"
+        primary_dependencies.append(full_dependency_name)
+        explanations[full_dependency_name] = reason.strip()
+
+    if len(primary_dependencies) < pad_to:
+        default_fallbacks = [f"Feature {i+1} (for {feature}{context_string})" for i in range(pad_to - len(primary_dependencies))]
+        primary_dependencies.extend(default_fallbacks)
+
+    return {"Primary": primary_dependencies[:20]}, explanations  # Trim to 20 max
+
+
+def build_dataset_entry(parsed_dependencies, existing=()):
+    """ The dataset app's {"Primary", "Explanations"} entry, leaving out dependencies already in `existing`. """
+    primary_dependencies = []
+    explanations = {}
+    for feature_name, reason in parsed_dependencies:
+        primary_dependencies.append(feature_name.strip())
+        explanations[feature_name.strip()] = reason.strip()
+
+    existing = set(existing)
+    new_primary_dependencies = [dep for dep in primary_dependencies if dep not in existing]
+    return {"Primary": new_primary_dependencies[:20], "Explanations": explanations}
+
+
+def feature_graph_document(selected_dependencies, dependencies, explanations):
+    """ Graph document of the AI app: selections with their explanations, suggestions kept as state. """
+    reasons = {}
+    for parent, children in selected_dependencies.items():
+        explained = explanations_by_name(dependencies.get(parent, {}), explanations.get(parent, {}))
+        for child in children:
+            if explained.get(child):
+                reasons[(parent, child)] = explained[child]
+    state = {"dependencies": dict(dependencies.items()), "explanations": dict(explanations.items())}
+    return build_graph_document(selected_dependencies, reasons, state=state)
+
+
+def dataset_graph_document(dependencies, level_mapping, ai_dependencies):
+    """ Graph document of the dataset app: correlation levels, AI explanations and suggestions. """
+    reasons = {}
+    for parent, children in dependencies.items():
+        explained = ai_dependencies.get(parent, {}).get("Explanations", {})
+        for child in children:
+            if explained.get(child):
+                reasons[(parent, child)] = explained[child]
+    state = {"ai_dependencies": dict(ai_dependencies.items()), "level_mapping": level_mapping}
+    return build_graph_document(dependencies, reasons, levels=level_mapping, state=state)
+
+
+# 🔹 Auto-selection policies: policy(feature, [(candidate, reason)], k, rng) -> candidates to keep
+def select_first(feature, candidates, k, rng):
+    """ The first k, in the order the model ranked them. """
+    return [name for name, _ in candidates[:k]]
+
+
+def select_random(feature, candidates, k, rng):
+    """ A seeded random sample of k, kept in the model's order. """
+    picked = sorted(rng.sample(range(len(candidates)), min(k, len(candidates))))
+    return [candidates[i][0] for i in picked]
+
+
+def select_explained(feature, candidates, k, rng):
+    """ The k with the most detailed reasons (specific dependencies tend to be explained at length). """
+    ranked = sorted(range(len(candidates)), key=lambda i: -len(candidates[i][1]))[:k]
+    return [candidates[i][0] for i in sorted(ranked)]
+
+
+def select_all(feature, candidates, k, rng):
+    """ Every candidate (k is ignored); the tree grows with the model's full fan-out. """
+    return [name for name, _ in candidates]
+
+
+SELECTION_POLICIES = {
+    "first": select_first,
+    "random": select_random,
+    "explained": select_explained,
+    "all": select_all,
+}
+
+
+def resolve_policy(policy):
+    """ A policy function from a name in SELECTION_POLICIES, "package.module:function", or a callable. """
+    if callable(policy):
+        return policy
+    if policy in SELECTION_POLICIES:
+        return SELECTION_POLICIES[policy]
+    module_name, _, attr = policy.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ValueError(f"Unknown selection policy '{policy}' (choose from {', '.join(SELECTION_POLICIES)} or package.module:function).") from e
+
+
+def fetch_feature_dependencies(features, batch=True):
+    """ {feature: (entry, explanations)} for free-text features, without placeholder padding.
+
+    With `batch`, all features share one structured request; those it misses fall back
+    to the single-feature prompt. Model errors propagate to the caller.
+    """
+    parsed = {}
+    if batch and len(features) > 1:
+        try:
+            parsed = generate_batch(features)
+        except Exception as e:
+            logger.warning("Batch AI error, falling back to single requests: %s", e)
+    results = {}
+    for feature in features:
+        if feature not in parsed:
+            response_text = generate_text(build_feature_prompt(feature)) or ""
+            parsed[feature] = [pair for pair in map(parse_feature_line, response_text.split("\n")) if pair]
+        results[feature] = build_dependency_entry(feature, parsed[feature], pad_to=0)
+    return results
+
+
+def fetch_dataset_dependencies(features, dataset_features, existing, batch=True):
+    """ {feature: {"Primary", "Explanations"}} of AI suggestions in a dataset's context; see `fetch_feature_dependencies`. """
+    parsed = {}
+    if batch and len(features) > 1:
+        try:
+            parsed = generate_batch(features, dataset_features)
+        except Exception as e:
+            logger.warning("Batch AI error, falling back to single requests: %s", e)
+    results = {}
+    for feature in features:
+        if feature not in parsed:
+            response_text = generate_text(build_dataset_prompt(feature, dataset_features)) or ""
+            parsed[feature] = [pair for pair in map(parse_dataset_line, response_text.split("\n")) if pair]
+        results[feature] = build_dataset_entry(parsed[feature], existing.get(feature, []))
+    return results
+
+
+def _fetch_levelwise(features, fetch, batch, workers):
+    """ Run `fetch(job)` over batches (or single features) concurrently; returns ({feature: result}, {feature: error}). """
+    jobs = chunked(features) if batch else [(feature,) for feature in features]
+    results, errors = {}, {}
+    for job, job_results, error in expand_concurrently(jobs, fetch, max_workers=workers):
+        for feature in job:
+            if error is not None:
+                errors[feature] = str(error)
+            else:
+                results[feature] = job_results[feature]
+    return results, errors
+
+
+def expand_feature_tree(target, max_depth=2, fan_out=5, policy="first", seed=0, batch=True, workers=DEFAULT_MAX_WORKERS):
+    """ Grow the AI app's dependency tree for a free-text target, `max_depth` levels deep.
+
+    Level by level, every feature of the frontier is expanded (batched, concurrently)
+    and the policy picks up to `fan_out` of its suggestions as children. A feature
+    already in the tree is never picked again, so the result is acyclic. Returns the
+    app's session state: {"dependencies", "explanations", "selected_dependencies"}
+    plus {"errors": {feature: message}} for expansions that failed (left as leaves).
+    """
+    select = resolve_policy(policy)
+    rng = random.Random(seed)
+    dependencies, explanations, selected, errors = {}, {}, {target: []}, {}
+    seen = {target}
+    frontier = [target]
+
+    for _ in range(max_depth):
+        if not frontier:
+            break
+        results, failed = _fetch_levelwise(frontier, lambda job: fetch_feature_dependencies(job, batch), batch, workers)
+        errors.update(failed)
+        next_frontier = []
+        for feature in frontier:  # Input order, so seeded policies pick the same children every run
+            if feature not in results:
+                continue
+            dependencies[feature], explanations[feature] = results[feature]
+            reasons = explanations_by_name(dependencies[feature], explanations[feature])
+            names = dict.fromkeys(clean_feature_name(item) for item in dependencies[feature]["Primary"])
+            candidates = [(name, reasons.get(name, "")) for name in names if name and name not in seen]
+            children = list(dict.fromkeys(select(feature, candidates, fan_out, rng)))
+            selected[feature] = children
+            seen.update(children)
+            next_frontier.extend(children)
+        frontier = next_frontier
+
+    return {"dependencies": dependencies, "explanations": explanations, "selected_dependencies": selected, "errors": errors}
+
+
+def analyze_dataset(ingested, target, max_depth=3, fan_out=5, threshold=0.2, expand_levels=1, suggestions=3,
+                    policy="first", seed=0, batch=True, workers=DEFAULT_MAX_WORKERS):
+    """ The dataset app's analysis of one column: correlation tree plus AI-suggested new features.
+
+    Features of the correlation tree up to level `expand_levels - 1` get AI suggestions,
+    of which the policy adds up to `suggestions` per feature as new children. Returns
+    the app's session state: {"dependencies", "level_mapping", "ai_dependencies",
+    "new_features"} plus {"errors": {feature: message}}.
+    """
+    dependencies, level_mapping = extract_hierarchical_dependencies(
+        ingested.df, target, max_depth=max_depth, threshold=threshold, fan_out=fan_out, engine=ingested.correlation_engine(),
+    )
+    if not dependencies:
+        raise ValueError(f"'{target}' is not a column of the dataset.")
+
+    select = resolve_policy(policy)
+    rng = random.Random(seed)
+    dataset_features = ingested.df.columns.tolist()
+    to_expand = [feature for feature, level in level_mapping.items() if level < expand_levels]
+    ai_dependencies, errors = _fetch_levelwise(
+        to_expand, lambda job: fetch_dataset_dependencies(job, dataset_features, dependencies, batch), batch, workers,
+    )
+
+    taken = set(dataset_features) | set(dependencies)
+    new_features = []
+    for feature in to_expand:
+        if feature not in ai_dependencies:
+            continue
+        entry = ai_dependencies[feature]
+        candidates = [(name, entry["Explanations"].get(name, "")) for name in entry["Primary"] if name not in taken]
+        picked = list(dict.fromkeys(select(feature, candidates, suggestions, rng)))
+        dependencies[feature].extend(picked)
+        taken.update(picked)
+        new_features.extend(picked)
+
+    return {
+        "dependencies": dependencies, "level_mapping": level_mapping, "ai_dependencies": ai_dependencies,
+        "new_features": new_features, "errors": errors,
+    }
+
+
+# 🔹 Batch runs: one directory per target, one manifest line per target
+FORMAT_CHOICES = {suffix.lstrip("."): label for label, (suffix, _, _) in EXPORT_FORMATS.items()}
+
+
+def target_directory(out_dir, index, target):
+    slug = re.sub(r"[^\w.-]+", "_", str(target)).strip("_")[:80] or "target"
+    path = os.path.join(out_dir, f"{index:04d}_{slug}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_graph(directory, document):
+    path = os.path.join(directory, "graph.json")
+    with open(path, "wb") as file:
+        file.write(to_json(document))
+    return path
+
+
+def write_synthetic_dataset(directory, selected_dependencies, rows, seed, export_format, gen_workers):
+    """ Synthetic dataset of a feature tree; with several workers, Parquet parts written across processes. """
+    if gen_workers > 1:
+        parts = os.path.join(directory, "dataset_parts")
+        os.makedirs(parts, exist_ok=True)
+        _, written, _ = generate_parquet_shards(selected_dependencies, rows, seed=seed, workers=gen_workers, directory=parts)
+        return parts, written
+    suffix, _, _ = EXPORT_FORMATS[export_format]
+    path = os.path.join(directory, f"dataset{suffix}")
+    return path, write_chunks(iter_synthetic_chunks(selected_dependencies, rows=rows, seed=seed), path, export_format)
+
+
+def run_feature_target(target, directory, args):
+    tree = expand_feature_tree(
+        target, max_depth=args.depth, fan_out=args.fan_out, policy=args.policy, seed=args.seed,
+        batch=args.batch, workers=args.ai_workers,
+    )
+    selected = tree["selected_dependencies"]
+    graph_path = write_graph(directory, feature_graph_document(selected, tree["dependencies"], tree["explanations"]))
+    dataset_path, rows = write_synthetic_dataset(
+        directory, selected, args.rows, args.seed, FORMAT_CHOICES[args.format], args.gen_workers,
+    )
+    return {
+        "features": len({feature for children in selected.values() for feature in children} | set(selected)),
+        "edges": sum(len(children) for children in selected.values()),
+        "failed_expansions": tree["errors"], "rows": rows, "graph": graph_path, "dataset": dataset_path,
+    }
+
+
+def run_dataset_target(target, directory, args, ingested):
+    analysis = analyze_dataset(
+        ingested, target, max_depth=args.depth, fan_out=args.fan_out, threshold=args.threshold,
+        expand_levels=args.expand_levels, suggestions=args.suggestions, policy=args.policy, seed=args.seed,
+        batch=args.batch, workers=args.ai_workers,
+    )
+    graph_path = write_graph(
+        directory, dataset_graph_document(analysis["dependencies"], analysis["level_mapping"], analysis["ai_dependencies"]),
+    )
+    generated = synthesize_columns(ingested.df, analysis["dependencies"], analysis["new_features"], strength=args.strength, seed=args.seed)
+    export_format = FORMAT_CHOICES[args.format]
+    suffix, _, _ = EXPORT_FORMATS[export_format]
+    dataset_path = os.path.join(directory, f"expanded_dataset{suffix}")
+    rows = write_chunks([pd.concat([ingested.df, generated], axis=1)], dataset_path, export_format)
+    return {
+        "features": len(analysis["level_mapping"]), "new_features": analysis["new_features"],
+        "edges": sum(len(children) for children in analysis["dependencies"].values()),
+        "failed_expansions": analysis["errors"], "rows": rows, "graph": graph_path, "dataset": dataset_path,
+    }
+
+
+def run_batch(targets, run_target, out_dir, jobs=1):
+    """ Run `run_target(target, directory)` for every target on `jobs` threads, appending to manifest.jsonl.
+
+    A failing target is recorded with its error and does not stop the others.
+    Returns the number of failed targets.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    directories = {target: target_directory(out_dir, i, target) for i, target in enumerate(dict.fromkeys(targets))}
+
+    def timed(target):
+        started = time.perf_counter()
+        report = run_target(target, directories[target])
+        return dict(report, seconds=round(time.perf_counter() - started, 3))
+
+    failed = 0
+    with open(os.path.join(out_dir, "manifest.jsonl"), "a", encoding="utf-8") as manifest:
+        # Whole targets are never cut off; each expansion inside one has its own timeout
+        for target, report, error in expand_concurrently(directories, timed, max_workers=jobs, timeout=float("inf")):
+            if error is not None:
+                failed += 1
+                report = {"error": f"{type(error).__name__}: {error}"}
+                print(f"✗ {target}: {report['error']}")
+            else:
+                print(f"✓ {target}: {report['features']} features, {report['edges']} edges, {report['rows']:,} rows in {report['seconds']:.1f} s")
+            manifest.write(json.dumps(dict({"target": target, "finished_at": time.time()}, **report), ensure_ascii=False) + "\n")
+            manifest.flush()
+    return failed
+
+
+def read_targets(args):
+    targets = list(args.targets)
+    if args.targets_file:
+        with open(args.targets_file, encoding="utf-8") as file:
+            targets += [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+    return targets
+
+
+def main():
+    logging.basicConfig(format="%(levelname)s: %(message)s")  # Model fallbacks and ingest warnings go to stderr
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--targets-file", help="File with one target per line (# starts a comment)")
+    common.add_argument("--depth", type=int, help="Levels of dependencies below each target (default: 2 for features, 3 for dataset)")
+    common.add_argument("--fan-out", type=int, default=5, help="Dependencies kept per feature")
+    common.add_argument("--policy", default="first", help=f"Auto-selection policy: {', '.join(SELECTION_POLICIES)} or package.module:function")
+    common.add_argument("--seed", type=int, default=42, help="Seed of random selection and of the generated data")
+    common.add_argument("--format", choices=list(FORMAT_CHOICES), default="parquet")
+    common.add_argument("--out", default="daviz_runs", help="Output directory (one subdirectory per target)")
+    common.add_argument("--jobs", type=int, default=4, help="Targets processed concurrently")
+    common.add_argument("--ai-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent AI requests per target")
+    common.add_argument("--no-batch", dest="batch", action="store_false", help="One AI request per feature instead of batched prompts")
+    common.add_argument("--backend", default=ai_client.DEFAULT_BACKEND, help="Model backend: gemini, stub or package.module:function")
+
+    features = subparsers.add_parser("features", parents=[common], help="Free-text targets, as in the AI-generated dataset app")
+    features.add_argument("targets", nargs="*", help="Target features, e.g. 'AI recruiter agent'")
+    features.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Rows of synthetic data per target")
+    features.add_argument("--gen-workers", type=int, default=1, help="Processes per dataset (more than 1 writes Parquet parts)")
+
+    dataset = subparsers.add_parser("dataset", parents=[common], help="Columns of a CSV, as in the dataset app")
+    dataset.add_argument("csv", help="Dataset to analyze")
+    dataset.add_argument("targets", nargs="*", help="Target columns (default: every column)")
+    dataset.add_argument("--threshold", type=float, default=0.2, help="Minimum absolute correlation of a dependency")
+    dataset.add_argument("--expand-levels", type=int, default=1, help="Tree levels that get AI-suggested features (0: none)")
+    dataset.add_argument("--suggestions", type=int, default=3, help="AI-suggested features kept per expanded feature")
+    dataset.add_argument("--strength", type=float, default=0.6, help="Dependency strength of generated features (0-0.95)")
+
+    args = parser.parse_args()
+    if args.depth is None:
+        args.depth = 3 if args.mode == "dataset" else 2  # The dataset app's default traversal depth is 3
+    try:
+        ai_client.configure(args.backend)
+        resolve_policy(args.policy)  # Fail before any work on a typo
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.mode == "features":
+        targets = read_targets(args)
+        run_target = lambda target, directory: run_feature_target(target, directory, args)
+    else:
+        with open(args.csv, "rb") as file:
+            ingested = read_csv_chunked(file)
+        targets = read_targets(args) or ingested.df.columns.tolist()
+        run_target = lambda target, directory: run_dataset_target(target, directory, args, ingested)
+    if not targets:
+        parser.error("no targets given")
+
+    failed = run_batch(targets, run_target, args.out, jobs=args.jobs)
+    print(f"{len(targets) - failed} of {len(targets)} targets done; manifest in {os.path.join(args.out, 'manifest.jsonl')}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
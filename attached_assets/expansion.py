@@ -0,0 +1,45 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 🔹 Concurrency limits for AI expansion (override through .env)
+DEFAULT_MAX_WORKERS = int(os.getenv("DAVIZ_EXPAND_WORKERS", 8))
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("DAVIZ_EXPAND_TIMEOUT", 60))
+
+
+def expand_concurrently(features, fetch, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT_SECONDS, initializer=None):
+    """ Run `fetch(feature)` for every feature on a thread pool.
+
+    Yields `(feature, result, error)` in completion order, so callers can merge each
+    expansion as soon as it lands. A call still running `timeout` seconds after it
+    started is reported with a TimeoutError and its late result is discarded. A
+    running thread cannot be stopped from here: `fetch` must bound its own calls
+    (model requests carry the gateway's timeout, see ai_client).
+    """
+    features = list(dict.fromkeys(features))  # Keep order, drop duplicates
+    if not features:
+        return
+
+    started = {}
+
+    def run(feature):
+        started[feature] = time.monotonic()
+        return fetch(feature)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(features))), initializer=initializer)
+    try:
+        pending = {executor.submit(run, feature): feature for feature in features}
+        while pending:
+            done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                feature = pending.pop(future)
+                error = future.exception()
+                yield feature, None if error else future.result(), error
+
+            now = time.monotonic()
+            for future, feature in list(pending.items()):
+                if feature in started and now - started[feature] > timeout:
+                    del pending[future]  # Still running: it finishes on its own, unobserved
+                    yield feature, None, TimeoutError(f"Expansion of '{feature}' timed out after {timeout:.0f}s")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,104 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+# 🔹 Supported export formats: {label: (file suffix, compression, mime type)}
+EXPORT_FORMATS = {
+    "CSV": (".csv", None, "text/csv"),
+    "CSV (gzip)": (".csv.gz", "gzip", "application/gzip"),
+    "Parquet (zstd)": (".parquet", "zstd", "application/vnd.apache.parquet"),
+}
+EXPORT_PREFIX = "daviz_"
+DEFAULT_EXPORT_MAX_AGE = float(os.getenv("DAVIZ_EXPORT_MAX_AGE", 6 * 3600))  # Seconds a temporary export stays downloadable
+
+
+def write_csv_chunks(chunks, path, compression=None):
+    """ Append DataFrame chunks to one CSV file; only the first chunk writes the header. """
+    opener = gzip.open if compression == "gzip" else open
+    rows = 0
+    with opener(path, "wt", encoding="utf-8", newline="") as handle:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(handle, index=False, header=(i == 0))
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet_chunks(chunks, path, compression="zstd"):
+    """ Write DataFrame chunks as row groups of one Parquet file. """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs the 'pyarrow' package (pip install pyarrow).") from e
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_chunks(chunks, path, export_format="CSV"):
+    """ Write DataFrame chunks to `path` in one of EXPORT_FORMATS; returns rows written. """
+    _, compression, _ = EXPORT_FORMATS[export_format]
+    if export_format.startswith("Parquet"):
+        return write_parquet_chunks(chunks, path, compression)
+    return write_csv_chunks(chunks, path, compression)
+
+
+def export_chunks(chunks, export_format="CSV", on_chunk=None):
+    """ Stream chunks into a temporary file in the chosen format; returns (path, rows written).
+
+    Only one chunk is in memory at a time. `on_chunk(chunk)` is called as each chunk
+    passes through, e.g. to keep a preview or report progress.
+    """
+    suffix, _, _ = EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix=EXPORT_PREFIX)
+    os.close(fd)
+
+    def observed(source):
+        for chunk in source:
+            if on_chunk is not None:
+                on_chunk(chunk)
+            yield chunk
+
+    try:
+        rows = write_chunks(observed(chunks), path, export_format)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, rows
+
+
+def remove_stale_exports(max_age=DEFAULT_EXPORT_MAX_AGE, directory=None):
+    """ Delete temporary exports (and leftover shard directories) older than `max_age` seconds; returns how many.
+
+    Exports outlive the session that made them when its tab is closed, so each new
+    export sweeps up the old ones, whichever session wrote them.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(directory or tempfile.gettempdir()):
+        if not entry.name.startswith(EXPORT_PREFIX):
+            continue
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+        except OSError:  # Removed by another session meanwhile, or not ours to delete
+            continue
+        removed += 1
+    return removed
@@ -0,0 +1,181 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+from xml.etree.ElementTree import ParseError
+
+from graph_view import dependency_levels
+
+GRAPH_DOCUMENT_FORMAT = "daviz-dependency-graph"
+GRAPH_DOCUMENT_VERSION = 1
+
+
+def build_graph_document(selected_dependencies, reasons=None, levels=None, state=None):
+    """ Plain-data description of a dependency graph: nodes with levels, edges with their explanations.
+
+    `reasons` maps (parent, child) to the explanation of that dependency; `levels`
+    defaults to breadth-first levels from the features nothing depends on. `state`
+    is whatever else the app needs to resume without asking the model again
+    (suggestion lists, explanations); it must be JSON-serializable.
+    """
+    bfs_levels, edges = dependency_levels(selected_dependencies)
+    levels = levels or {}
+    reasons = reasons or {}
+    return {
+        "format": GRAPH_DOCUMENT_FORMAT,
+        "version": GRAPH_DOCUMENT_VERSION,
+        "nodes": [{"id": node, "level": levels.get(node, level)} for node, level in bfs_levels.items()],
+        "edges": [
+            dict({"source": parent, "target": child}, **({"reason": reasons[(parent, child)]} if reasons.get((parent, child)) else {}))
+            for parent, child in edges
+        ],
+        "state": state or {},
+    }
+
+
+def document_dependencies(document):
+    """ {parent: [children]} of a graph document; every node is a key, so leaves keep their place. """
+    dependencies = {node["id"]: [] for node in document["nodes"]}
+    for edge in document["edges"]:
+        dependencies.setdefault(edge["source"], []).append(edge["target"])
+        dependencies.setdefault(edge["target"], [])
+    return dependencies
+
+
+def document_levels(document):
+    return {node["id"]: node["level"] for node in document["nodes"] if node.get("level") is not None}
+
+
+def document_reasons(document):
+    return {(edge["source"], edge["target"]): edge["reason"] for edge in document["edges"] if edge.get("reason")}
+
+
+def _checked(document):
+    # Shape checks up front, so a well-formed file of the wrong kind fails here and not halfway through a restore
+    if not isinstance(document, dict) or document.get("format") != GRAPH_DOCUMENT_FORMAT:
+        raise ValueError("Not a saved dependency graph.")
+    version = document.get("version", 0)
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise ValueError("Saved graph has no valid format version.")
+    if version > GRAPH_DOCUMENT_VERSION:
+        raise ValueError(f"Saved graph format version {version} is newer than this app supports.")
+    document.setdefault("state", {})
+    nodes, edges = document.get("nodes"), document.get("edges")
+    if not (isinstance(nodes, list) and isinstance(edges, list) and isinstance(document["state"], dict)):
+        raise ValueError("Saved graph is missing its nodes, edges or state.")
+    if not all(isinstance(node, dict) and isinstance(node.get("id"), str) for node in nodes):
+        raise ValueError("Saved graph has a node without a text id.")
+    if not all(_is_level(node.get("level")) for node in nodes):
+        raise ValueError("Saved graph has a node whose level is not a whole number.")
+    if not all(isinstance(edge, dict) and isinstance(edge.get("source"), str) and isinstance(edge.get("target"), str) for edge in edges):
+        raise ValueError("Saved graph has an edge without a text source and target.")
+    return document
+
+
+def _is_level(level):
+    return level is None or (isinstance(level, int) and not isinstance(level, bool))
+
+
+def to_json(document):
+    """ Compact UTF-8 JSON. """
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def from_json(data):
+    return _checked(json.loads(data))
+
+
+def to_graphml(document):
+    """ GraphML (readable by Gephi, yEd, networkx); app state rides along as a JSON graph attribute. """
+    import networkx as nx
+
+    graph = nx.DiGraph(format=GRAPH_DOCUMENT_FORMAT, version=GRAPH_DOCUMENT_VERSION, state=json.dumps(document["state"]))
+    for node in document["nodes"]:
+        graph.add_node(node["id"], level=node["level"])
+    for edge in document["edges"]:
+        graph.add_edge(edge["source"], edge["target"], reason=edge.get("reason", ""))
+    return "\n".join(nx.generate_graphml(graph)).encode("utf-8")
+
+
+def from_graphml(data):
+    import networkx as nx
+
+    graph = nx.read_graphml(io.BytesIO(data))
+    return _checked({
+        "format": graph.graph.get("format"),
+        "version": graph.graph.get("version", 0),
+        "nodes": [{"id": node, "level": attrs.get("level")} for node, attrs in graph.nodes(data=True)],
+        "edges": [
+            dict({"source": parent, "target": child}, **({"reason": attrs["reason"]} if attrs.get("reason") else {}))
+            for parent, child, attrs in graph.edges(data=True)
+        ],
+        "state": json.loads(graph.graph.get("state") or "{}"),
+    })
+
+
+EDGE_LIST_HEADER = ["parent", "child", "reason"]
+
+
+def to_edge_list(document):
+    """ Gzipped tab-separated edges (parent, child, reason); a node without edges is a row with no child. """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter="\t", lineterminator="\n")
+    writer.writerow(EDGE_LIST_HEADER)
+    linked = set()
+    for edge in document["edges"]:
+        writer.writerow([edge["source"], edge["target"], edge.get("reason", "")])
+        linked.update((edge["source"], edge["target"]))
+    for node in document["nodes"]:
+        if node["id"] not in linked:
+            writer.writerow([node["id"], "", ""])
+    return gzip.compress(buffer.getvalue().encode("utf-8"), mtime=0)
+
+
+def from_edge_list(data):
+    """ Graph document from a (gzipped) edge list; levels are recomputed from the edges. """
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    rows = csv.reader(io.StringIO(data.decode("utf-8")), delimiter="\t")
+    if next(rows, None) != EDGE_LIST_HEADER:
+        raise ValueError("Not a dependency graph edge list (expected a parent/child/reason header).")
+    dependencies = {}
+    reasons = {}
+    for row in rows:
+        parent, child, reason = (row + ["", ""])[:3]
+        dependencies.setdefault(parent, [])
+        if child:
+            dependencies[parent].append(child)
+            dependencies.setdefault(child, [])
+            if reason:
+                reasons[(parent, child)] = reason
+    return build_graph_document(dependencies, reasons)
+
+
+# 🔹 Export formats: {label: (file suffix, mime type, writer)}
+GRAPH_FORMATS = {
+    "JSON": (".json", "application/json", to_json),
+    "GraphML": (".graphml", "application/graphml+xml", to_graphml),
+    "Edge list (gzip)": (".tsv.gz", "application/gzip", to_edge_list),
+}
+GRAPH_FILE_TYPES = ["json", "graphml", "gz", "tsv"]
+
+
+def load_graph_document(data, file_name):
+    """ Read a saved graph in any of GRAPH_FORMATS, picked by file name (raises ValueError if unreadable). """
+    name = file_name.lower()
+    errors = (
+        KeyError, TypeError, AttributeError, UnicodeDecodeError, json.JSONDecodeError,
+        ParseError, csv.Error, gzip.BadGzipFile, EOFError, zlib.error,
+    )
+    try:
+        if name.endswith(".graphml"):
+            import networkx as nx
+
+            errors += (nx.NetworkXError,)
+            return from_graphml(data)
+        if name.endswith(".json"):
+            return from_json(data)
+        return from_edge_list(data)
+    except errors as e:
+        raise ValueError(f"Could not read {file_name}: {e}") from e
@@ -0,0 +1,461 @@
+import itertools
+import os
+import uuid
+from collections import deque
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAX_LOGGED_CHANGES = 200  # Clients further behind than this get a full snapshot instead
+LARGE_GRAPH_NODES = 300  # Above this, the client-side hierarchical solver gets slow: default to large-graph mode
+DEFAULT_COLLAPSE_DEPTH = 3
+LEVEL_SEPARATION = 300
+NODE_SPACING = 60
+
+# 🔹 Left-to-right hierarchy shared by both apps (vis.js options)
+GRAPH_OPTIONS = {
+    "layout": {
+        "hierarchical": {
+            "enabled": True,
+            "direction": "LR",
+            "sortMethod": "directed",
+            "levelSeparation": 300,
+            "nodeSpacing": 200,
+            "treeSpacing": 300,
+            "blockShifting": False,
+            "edgeMinimization": True,
+            "parentCentralization": True,
+        }
+    },
+    "physics": {"enabled": False},
+    "interaction": {"hover": True, "dragNodes": True, "dragView": True, "zoomView": True},
+    "edges": {
+        "color": {"color": "darkblue"},
+        "width": 2.5,
+        "smooth": {"type": "cubicBezier", "forceDirection": "horizontal"},
+    },
+    "nodes": {"font": {"size": 14, "face": "Arial"}, "shape": "box", "margin": 15},
+}
+
+# Large-graph mode: positions come from the server, so the browser only draws
+LARGE_GRAPH_OPTIONS = {
+    "layout": {"hierarchical": {"enabled": False}},
+    "physics": {"enabled": False},
+    "interaction": {"hover": True, "dragNodes": True, "dragView": True, "zoomView": True,
+                    "hideEdgesOnDrag": True, "hideEdgesOnZoom": True},
+    "edges": {"color": {"color": "darkblue"}, "width": 1.5, "smooth": False},
+    "nodes": {"font": {"size": 14, "face": "Arial"}, "shape": "box", "margin": 8},
+}
+
+# Static frontend (graph_component/index.html): keeps the vis.js DataSets alive and applies deltas
+_graph_component = None
+
+
+def _component():
+    # Declared on first render, so graph building and graph_io (CLI) never import Streamlit
+    global _graph_component
+    if _graph_component is None:
+        import streamlit.components.v1 as components
+
+        _graph_component = components.declare_component("dependency_graph", path=os.path.join(HERE, "graph_component"))
+    return _graph_component
+
+
+def style_by_parents(graph, node):
+    """ Features nothing points to are drawn large and blue, dependencies small and green. """
+    if graph.in_degree(node) == 0:
+        return {"color": "lightblue", "size": 30}
+    return {"color": "lightgreen", "size": 20}
+
+
+LEVEL_COLORS = {0: "lightgreen", 1: "lightblue", 2: "lightyellow", 3: "lightcoral", 4: "lightgray"}
+
+
+def style_by_level(graph, node):
+    """ Color by the node's `level` attribute (dataset levels); nodes without one are gray. """
+    return {"color": LEVEL_COLORS.get(graph.nodes[node].get("level"), "lightgray"), "size": 30, "title": str(node)}
+
+
+class DeltaLog:
+    """ Versioned log of vis.js deltas, the form in which views reach the browser. """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex  # Lets the browser tell a rebuilt view from an updated one
+        self.version = 0
+        self._log = []  # [(version, delta)] for the most recent MAX_LOGGED_CHANGES changes
+
+    def _append(self, delta):
+        if not any(delta.values()):
+            return
+        self.version += 1
+        self._log.append((self.version, delta))
+        del self._log[:-MAX_LOGGED_CHANGES]
+
+    def changes_since(self, version):
+        """ Deltas after `version` in order, or None when the log no longer reaches back that far. """
+        if version is None or version < 0 or version > self.version:
+            return None
+        if version == self.version:
+            return []
+        if not self._log or self._log[0][0] > version + 1:
+            return None
+        return [delta for logged_version, delta in self._log if logged_version > version]
+
+
+class DependencyGraph(DeltaLog):
+    """ Dependency graph kept in session state that records each change as a vis.js delta.
+
+    The networkx DiGraph is updated in place, and every mutation logs only the nodes and
+    edges it touched, so the browser view is patched in time proportional to the change.
+    Nodes added with `add_node` (or as a parent) stay until removed; nodes that were only
+    dependencies disappear once nothing points to them anymore.
+    """
+
+    def __init__(self, node_style=style_by_parents, edge_style=None):
+        super().__init__()
+        self._graph = None  # Created on first use, so an empty graph in session state costs no networkx import
+        self.node_style = node_style
+        self.edge_style = edge_style or {"color": "darkblue", "width": 2.5}
+        self._records = {}  # Node records as last sent to the browser
+        self._layout = (None, None)  # (version, (positions, levels))
+
+    @classmethod
+    def from_dependencies(cls, dependencies, levels=None, **kwargs):
+        """ Graph of a {parent: [children]} mapping, optionally with a `level` per node. """
+        graph = cls(**kwargs)
+        for node, level in (levels or {}).items():
+            graph.add_node(node, level=level)
+        for parent, children in dependencies.items():
+            graph.add_children(parent, children)
+        return graph
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            import networkx as nx
+
+            self._graph = nx.DiGraph()
+        return self._graph
+
+    def __len__(self):
+        return 0 if self._graph is None else len(self._graph)
+
+    def __contains__(self, node):
+        return self._graph is not None and node in self._graph
+
+    def add_node(self, node, **attrs):
+        """ Add (or update) a node that stays in the graph even without edges. """
+        self.graph.add_node(node, pinned=True, **attrs)
+        self._commit({node}, [], [], [])
+
+    def add_children(self, parent, children):
+        """ Add edges from `parent` to each child (existing edges are kept once). """
+        self._change(parent, [child for child in dict.fromkeys(children) if child != parent], [])
+
+    def set_children(self, parent, children):
+        """ Replace the dependencies of `parent`, dropping children nothing else points to. """
+        children = [child for child in dict.fromkeys(children) if child != parent]
+        kept = set(children)
+        removed = [child for child in self.graph.successors(parent) if child not in kept] if parent in self.graph else []
+        self._change(parent, children, removed)
+
+    def _change(self, parent, added_children, removed_children):
+        if parent not in self.graph or not self.graph.nodes[parent].get("pinned"):
+            self.graph.add_node(parent, pinned=True)
+        touched = {parent}
+        added_edges = []
+        for child in added_children:
+            if not self.graph.has_edge(parent, child):
+                self.graph.add_edge(parent, child)
+                added_edges.append((parent, child))
+                touched.add(child)
+
+        removed_edges = []
+        removed_nodes = []
+        for child in removed_children:
+            self.graph.remove_edge(parent, child)
+            removed_edges.append((parent, child))
+            touched.add(child)
+        # Unpinned nodes without parents are gone, along with whatever only they pointed to
+        orphans = [child for child in removed_children if self.graph.in_degree(child) == 0 and not self.graph.nodes[child].get("pinned")]
+        while orphans:
+            node = orphans.pop()
+            if node not in self.graph:
+                continue
+            for child in list(self.graph.successors(node)):
+                self.graph.remove_edge(node, child)
+                removed_edges.append((node, child))
+                touched.add(child)
+                if self.graph.in_degree(child) == 0 and not self.graph.nodes[child].get("pinned"):
+                    orphans.append(child)
+            self.graph.remove_node(node)
+            removed_nodes.append(node)
+        self._commit(touched, added_edges, removed_edges, removed_nodes)
+
+    def _node_record(self, node):
+        record = {"id": str(node), "label": str(node), "shape": "box"}
+        record.update(self.node_style(self.graph, node))
+        return record
+
+    def _edge_record(self, parent, child):
+        return dict(self.edge_style, id=edge_id(parent, child), to=str(child), **{"from": str(parent)})
+
+    def _commit(self, touched, added_edges, removed_edges, removed_nodes):
+        """ Log the records that changed as one delta and bump the version. """
+        for node in removed_nodes:
+            self._records.pop(node, None)
+        nodes = []
+        for node in touched:
+            if node in self.graph:
+                record = self._node_record(node)
+                if self._records.get(node) != record:
+                    self._records[node] = record
+                    nodes.append(record)
+        self._append({
+            "nodes": nodes,
+            "edges": [self._edge_record(parent, child) for parent, child in added_edges],
+            "removed_nodes": [str(node) for node in removed_nodes],
+            "removed_edges": [edge_id(parent, child) for parent, child in removed_edges],
+        })
+
+    def snapshot(self):
+        """ The whole graph as one delta (nodes and edges to add to an empty view). """
+        return {
+            "nodes": [self._records[node] for node in self.graph],
+            "edges": [self._edge_record(parent, child) for parent, child in self.graph.edges],
+            "removed_nodes": [],
+            "removed_edges": [],
+        }
+
+    def layout(self):
+        """ Server-side positions and levels, computed once per graph version (see `layered_layout`). """
+        version, layout = self._layout
+        if version != self.version:
+            layout = layered_layout(self.graph)
+            self._layout = (self.version, layout)
+        return layout
+
+
+def walk_starts(graph):
+    """ Nodes a breadth-first walk must start from to reach every node.
+
+    The roots (no incoming edge), then, in graph order, one node of each part only
+    reachable through a cycle (a pure cycle has no root at all).
+    """
+    starts = [node for node in graph if graph.in_degree(node) == 0]
+    reached = set(starts)
+    queue = deque(starts)
+    for start in itertools.chain([None], graph):
+        if start is not None and start not in reached:
+            starts.append(start)
+            reached.add(start)
+            queue.append(start)
+        while queue:
+            for child in graph.successors(queue.popleft()):
+                if child not in reached:
+                    reached.add(child)
+                    queue.append(child)
+    return starts
+
+
+def node_levels(graph):
+    """ Layer of every node: its `level` attribute when set (the dataset's level mapping), else BFS depth from `walk_starts`. """
+    levels = {}
+    queue = deque()
+
+    def place(node, level):
+        levels[node] = graph.nodes[node].get("level", level)
+        queue.append(node)
+
+    for start in walk_starts(graph):
+        place(start, 0)
+    while queue:
+        node = queue.popleft()
+        for child in graph.successors(node):
+            if child not in levels:
+                place(child, levels[node] + 1)
+    return levels
+
+
+def dependency_levels(selected_dependencies):
+    """ Level of every feature and every dependency edge exactly once, in one breadth-first pass.
+
+    Features nothing depends on start at level 0 (in mapping order); each feature is
+    expanded once, at its shallowest level, so shared subtrees are never walked again.
+    Features only reachable through a cycle start a new level-0 pass. Returns
+    ({feature: level} in discovery order, [(parent, child)]).
+    """
+    has_parent = {child for children in selected_dependencies.values() for child in children}
+    starts = [feature for feature in selected_dependencies if feature not in has_parent]
+    starts += [feature for feature in selected_dependencies if feature in has_parent]
+    levels = {}
+    edges = []
+    for start in starts:
+        if start in levels:
+            continue
+        levels[start] = 0
+        queue = deque([start])
+        while queue:
+            feature = queue.popleft()
+            for child in dict.fromkeys(selected_dependencies.get(feature, ())):
+                edges.append((feature, child))
+                if child not in levels:
+                    levels[child] = levels[feature] + 1
+                    queue.append(child)
+    return levels, edges
+
+
+def layered_layout(graph, level_separation=LEVEL_SEPARATION, node_spacing=NODE_SPACING):
+    """ Left-to-right layered positions in O(nodes + edges · log): one column per level.
+
+    Within a column, nodes are ordered by the mean height of their already placed
+    parents (one barycenter pass), which keeps most edges from crossing.
+    Returns ({node: (x, y)}, {node: level}).
+    """
+    levels = node_levels(graph)
+    layers = {}
+    for node, level in levels.items():
+        layers.setdefault(level, []).append(node)
+
+    heights = {}
+    positions = {}
+    for level in sorted(layers):
+        layer = layers[level]
+
+        def barycenter(node):
+            placed = [heights[parent] for parent in graph.predecessors(node) if parent in heights]
+            return sum(placed) / len(placed) if placed else 0.0
+
+        layer.sort(key=barycenter)
+        offset = (len(layer) - 1) * node_spacing / 2
+        for i, node in enumerate(layer):
+            heights[node] = i * node_spacing - offset
+            positions[node] = (level * level_separation, heights[node])
+    return positions, levels
+
+
+class CollapsedGraphView(DeltaLog):
+    """ Large-graph view of a DependencyGraph: fixed positions and collapsed deep subtrees.
+
+    Nodes below `collapse_depth` are only shown once their parent is expanded; until
+    then each collapsed parent gets one cluster node ("+N more") that expands it on
+    click. The view diffs what should be visible against what was sent, so expanding
+    a cluster only sends the revealed nodes.
+    """
+
+    def __init__(self, dependency_graph, collapse_depth=DEFAULT_COLLAPSE_DEPTH):
+        super().__init__()
+        self.source = dependency_graph
+        self.collapse_depth = collapse_depth
+        self.expanded = set()  # Node ids whose cluster was clicked
+        self._nodes = {}  # Records as sent, by id
+        self._edges = {}
+        self._synced = None
+
+    def expand(self, node_id):
+        self.expanded.add(node_id)
+
+    def _visible(self):
+        positions, levels = self.source.layout()
+        graph = self.source.graph
+
+        def is_open(node):
+            return levels[node] < self.collapse_depth or str(node) in self.expanded
+
+        roots = walk_starts(graph)  # Pure cycles have no root but still get one node shown
+        visible = dict.fromkeys(roots)
+        queue = deque(roots)
+        edges = {}
+        while queue:
+            node = queue.popleft()
+            if not is_open(node):
+                continue
+            for child in graph.successors(node):
+                record = self.source._edge_record(node, child)
+                edges[record["id"]] = record
+                if child not in visible:
+                    visible[child] = None
+                    queue.append(child)
+
+        nodes = {}
+        for node in visible:
+            x, y = positions[node]
+            record = dict(self.source._records[node], x=x, y=y)
+            nodes[record["id"]] = record
+            hidden = 0 if is_open(node) else graph.out_degree(node)
+            if hidden:
+                cluster = f"cluster:{node}"
+                nodes[cluster] = {
+                    "id": cluster, "label": f"+{hidden} more", "shape": "ellipse", "color": "white",
+                    "x": x + LEVEL_SEPARATION / 2, "y": y, "expands": str(node),
+                    "title": f"Show the dependencies of {node}",
+                }
+                edges[edge_id(node, cluster)] = dict(self.source._edge_record(node, cluster), dashes=True)
+        return nodes, edges
+
+    def sync(self):
+        """ Log the difference between the visible graph and what was sent (only after a change). """
+        state = (self.source.version, len(self.expanded))
+        if state == self._synced:
+            return
+        self._synced = state
+        nodes, edges = self._visible()
+        self._append({
+            "nodes": [record for node_id, record in nodes.items() if self._nodes.get(node_id) != record],
+            "edges": [record for edge, record in edges.items() if self._edges.get(edge) != record],
+            "removed_nodes": [node_id for node_id in self._nodes if node_id not in nodes],
+            "removed_edges": [edge for edge in self._edges if edge not in edges],
+        })
+        self._nodes, self._edges = nodes, edges
+
+    def snapshot(self):
+        return {"nodes": list(self._nodes.values()), "edges": list(self._edges.values()), "removed_nodes": [], "removed_edges": []}
+
+
+def large_graph_view(dependency_graph, key, collapse_depth=DEFAULT_COLLAPSE_DEPTH):
+    """ The session's collapsed view of `dependency_graph` for component `key`, with clicked clusters expanded. """
+    import streamlit as st
+
+    view_key = f"{key}_large_view"
+    view = st.session_state.get(view_key)
+    if view is None or view.source is not dependency_graph or view.collapse_depth != collapse_depth:
+        view = CollapsedGraphView(dependency_graph, collapse_depth)
+        st.session_state[view_key] = view
+    clicked = st.session_state.get(key) or {}
+    if clicked.get("graph_id") == view.id and clicked.get("expand") is not None:
+        view.expand(clicked["expand"])
+    view.sync()
+    return view
+
+
+def edge_id(parent, child):
+    return f"{parent}→{child}"
+
+
+def render_dependency_graph(dependency_graph, key, height=600, options=None, large=False, collapse_depth=DEFAULT_COLLAPSE_DEPTH):
+    """ Show `dependency_graph` in a persistent browser view, sending only what changed.
+
+    The view reports the version it has applied (its component value); the next rerun
+    sends just the deltas after it, or a full snapshot if the view is new or out of sync.
+    `large=True` switches to the collapsed, server-laid-out view (`CollapsedGraphView`).
+    """
+    import streamlit as st
+
+    options = options or GRAPH_OPTIONS
+    if large:
+        dependency_graph = large_graph_view(dependency_graph, key, collapse_depth)
+        options = dict(LARGE_GRAPH_OPTIONS, nodes=dict(options["nodes"], margin=8))
+    applied = st.session_state.get(key) or {}
+    deltas = None
+    if applied.get("graph_id") == dependency_graph.id:
+        deltas = dependency_graph.changes_since(applied.get("version"))
+    reset = deltas is None
+    _component()(
+        graph_id=dependency_graph.id,
+        version=dependency_graph.version,
+        base=0 if reset else applied["version"],
+        reset=reset,
+        deltas=[dependency_graph.snapshot()] if reset else deltas,
+        options=options,
+        height=height,
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import get_cache as get_columnar_cache
+from correlation_engine import CorrelationEngine, CorrelationStats
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Ingestion limits (override through .env)
+DEFAULT_CHUNK_ROWS = int(os.getenv("DAVIZ_CSV_CHUNK_ROWS", 200_000))
+DEFAULT_MEMORY_BUDGET = int(os.getenv("DAVIZ_CSV_MEMORY_BUDGET", 512 * 1024 * 1024))  # Bytes of parsed rows kept
+MAX_STATS_COLUMNS = 1000  # Cross-products grow with columns²; wider files correlate from the kept rows instead
+
+
+def file_digest(file_obj):
+    """ Content hash of a file-like object (the read position is restored afterwards). """
+    position = file_obj.tell()
+    file_obj.seek(0)
+    digest = hashlib.blake2b(digest_size=20)
+    for block in iter(lambda: file_obj.read(1024 * 1024), b""):
+        digest.update(block if isinstance(block, bytes) else block.encode("utf-8"))
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+def compact_numeric(series):
+    """ Smallest dtype that holds a numeric column: downcast integers, float32 for floats. """
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    return series.astype(np.float32)
+
+
+class IngestedCSV:
+    """ Result of a chunked CSV read: a compact frame plus correlation statistics over every row. """
+
+    def __init__(self, df, stats, total_rows, digest):
+        self.df = df
+        self.stats = stats
+        self.total_rows = total_rows
+        self.digest = digest
+
+    @property
+    def truncated(self):
+        """ True when only the leading rows fit in the memory budget. """
+        return len(self.df) < self.total_rows
+
+    def correlation_engine(self, dtype=np.float64):
+        """ Correlations over every row when statistics were streamed, otherwise over the kept rows. """
+        if self.stats is not None:
+            return CorrelationEngine.from_stats(self.stats)
+        return CorrelationEngine(self.df, dtype=dtype)
+
+
+def iter_csv_chunks(file_obj, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ DataFrame chunks of a CSV file, read from its start. """
+    file_obj.seek(0)
+    return pd.read_csv(file_obj, chunksize=chunk_rows)
+
+
+def read_csv_chunked(file_obj, chunk_rows=DEFAULT_CHUNK_ROWS, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """ Parse a CSV chunk by chunk with compact dtypes, streaming correlation statistics (see `ingest_chunks`).
+
+    The file is first converted into the columnar cache, which settles each column's
+    type over the whole file (a numeric column with text further down becomes text),
+    then read back chunk by chunk.
+    """
+    digest = file_digest(file_obj)
+    cache = get_columnar_cache()
+    cache.ensure(digest, lambda: iter_csv_chunks(file_obj, chunk_rows))
+    ingested = ingest_chunks(cache.iter_chunks(digest, chunk_rows=chunk_rows), memory_budget)
+    ingested.digest = digest
+    return ingested
+
+
+def ingest_chunks(reader, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """ Compact frame and correlation statistics from DataFrame chunks of one file.
+
+    Numeric columns are decided from the first chunk, so chunks should come with
+    types settled over the whole file (as the columnar cache gives them); text found
+    later in a numeric column becomes missing, with a warning. Text columns become categoricals whose codes follow first
+    appearance, the same encoding `pd.factorize` gives the whole column. Rows are
+    kept until `memory_budget` bytes are used; statistics (collected for up to
+    MAX_STATS_COLUMNS columns) always cover the full file.
+    """
+    numeric_columns = None
+    category_codes = {}  # {column: {value: code}}
+    stats = None
+    kept_chunks = []
+    kept_bytes = 0
+    total_rows = 0
+
+    for chunk in reader:
+        if numeric_columns is None:
+            numeric_columns = [
+                col for col in chunk.columns
+                if pd.api.types.is_numeric_dtype(chunk[col]) or pd.api.types.is_bool_dtype(chunk[col])
+            ]
+            category_codes = {col: {} for col in chunk.columns if col not in numeric_columns}
+            stats = CorrelationStats(chunk.columns) if len(chunk.columns) <= MAX_STATS_COLUMNS else None
+
+        matrix = np.empty((len(chunk), len(chunk.columns)), dtype=np.float64)
+        for i, col in enumerate(chunk.columns):
+            if col in category_codes:
+                codes, uniques = pd.factorize(chunk[col])
+                mapping = category_codes[col]
+                global_codes = np.array([mapping.setdefault(value, len(mapping)) for value in uniques], dtype=np.int64)
+                matrix[:, i] = np.where(codes < 0, -1, global_codes[codes] if len(uniques) else codes)
+                chunk[col] = pd.Categorical(chunk[col], categories=list(mapping))
+            else:
+                values = pd.to_numeric(chunk[col], errors="coerce")
+                coerced = int(values.isna().sum() - chunk[col].isna().sum())
+                if coerced:
+                    logger.warning("%d non-numeric values in numeric column %r were read as missing.", coerced, col)
+                matrix[:, i] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                chunk[col] = compact_numeric(values)
+        if stats is not None:
+            stats.update(matrix)
+        total_rows += len(chunk)
+
+        if kept_bytes < memory_budget:
+            kept_chunks.append(chunk)
+            kept_bytes += int(chunk.memory_usage(deep=True).sum())
+
+    if numeric_columns is None:
+        return IngestedCSV(pd.DataFrame(), None, 0, None)
+
+    # Align categories so concatenation keeps the compact categorical dtype
+    for chunk in kept_chunks:
+        for col, mapping in category_codes.items():
+            chunk[col] = chunk[col].cat.set_categories(list(mapping))
+    df = pd.concat(kept_chunks, ignore_index=True)
+    return IngestedCSV(df, stats, total_rows, None)
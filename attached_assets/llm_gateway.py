@@ -0,0 +1,253 @@
+import itertools
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+# 🔹 Upstream model call limits (override through .env)
+DEFAULT_RATE = float(os.getenv("DAVIZ_LLM_RATE", 2.0))  # Sustained calls per second; 0 disables the limit
+DEFAULT_BURST = int(os.getenv("DAVIZ_LLM_BURST", 5))
+DEFAULT_RETRIES = int(os.getenv("DAVIZ_LLM_RETRIES", 4))
+DEFAULT_TIMEOUT = float(os.getenv("DAVIZ_LLM_TIMEOUT", 60))  # Seconds per attempt; between chunks when streaming
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 30.0
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GatewayTimeout(TimeoutError):
+    """ An upstream call did not answer within the gateway's per-call timeout. """
+
+
+class _Abandoned(Exception):
+    # A streaming leader whose reader stopped early: waiting callers start their own request
+    pass
+
+
+def is_transient(error):
+    """ Errors worth retrying: timeouts, dropped connections and HTTP 408/429/5xx (google.api_core errors carry `.code`). """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        return int(getattr(error, "code", None)) in TRANSIENT_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+class TokenBucket:
+    """ Up to `burst` calls at once, refilled at `rate` per second.
+
+    Callers reserve a token and sleep until it is due, so waiting callers are served in
+    arrival order without polling.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """ Take a token; returns the seconds to wait before using it. """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+def _run_with_timeout(fn, timeout):
+    # The call runs on its own daemon thread: a hung request can be abandoned, not interrupted
+    if timeout is None or timeout <= 0:
+        return fn()
+    done = Future()
+
+    def run():
+        try:
+            done.set_result(fn())
+        except BaseException as e:
+            done.set_exception(e)
+
+    threading.Thread(target=run, name="llm-call", daemon=True).start()
+    try:
+        return done.result(timeout)
+    except TimeoutError:
+        if done.done():  # The call itself raised a TimeoutError
+            raise
+        raise GatewayTimeout(f"No answer from the model within {timeout:g} s.") from None
+
+
+def _iter_with_timeout(open_stream, timeout):
+    # Chunks are pumped through a queue so a stalled stream times out between chunks
+    if timeout is None or timeout <= 0:
+        yield from open_stream()
+        return
+    chunks = queue.Queue()
+
+    def pump():
+        try:
+            for chunk in open_stream():
+                chunks.put((True, chunk))
+            chunks.put((False, None))
+        except BaseException as e:
+            chunks.put((False, e))
+
+    threading.Thread(target=pump, name="llm-stream", daemon=True).start()
+    while True:
+        try:
+            more, item = chunks.get(timeout=timeout)
+        except queue.Empty:
+            raise GatewayTimeout(f"The model stream stalled for {timeout:g} s.") from None
+        if not more:
+            if item is not None:
+                raise item
+            return
+        yield item
+
+
+class LLMGateway:
+    """ Process-wide front door for model calls shared by every session.
+
+    Each upstream attempt waits for a token-bucket slot and runs under a timeout;
+    transient errors are retried with full-jitter exponential backoff. Concurrent
+    calls with the same key (same model and prompt) share a single upstream call
+    and its result or final error.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT,
+                 backoff_base=BACKOFF_BASE_SECONDS, backoff_cap=BACKOFF_CAP_SECONDS, sleep=time.sleep):
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._sleep = sleep
+        self._flights = {}  # {key: Future of the call in progress}
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(["calls", "upstream", "coalesced", "retries", "timeouts", "failures"], 0)
+        self._stats["throttled_seconds"] = 0.0
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def backoff(self, attempt):
+        """ Full jitter: uniform in [0, min(cap, base · 2^attempt)], so retrying callers spread out. """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _with_retries(self, attempt_call):
+        for attempt in itertools.count():
+            wait = self.bucket.reserve()
+            if wait:
+                self._count("throttled_seconds", wait)
+                self._sleep(wait)
+            self._count("upstream")
+            try:
+                return attempt_call()
+            except Exception as e:
+                if isinstance(e, GatewayTimeout):
+                    self._count("timeouts")
+                if attempt >= self.retries or not is_transient(e):
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                self._sleep(self.backoff(attempt))
+
+    def _join(self, key):
+        # (flight, True) when this caller must make the call, else the flight to wait for
+        self._count("calls")
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats["coalesced"] += 1
+                return flight, False
+            flight = self._flights[key] = Future()
+            return flight, True
+
+    def _leave(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _lead(self, key):
+        # Wait for identical calls in progress; returns (flight to complete, None) or (None, their result)
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                return flight, None
+            try:
+                return None, flight.result()
+            except _Abandoned:
+                continue
+
+    def call(self, key, fn):
+        """ `fn()` (one model call) through the gateway; callers with an equal `key` in progress get its outcome. """
+        flight, shared = self._lead(key)
+        if flight is None:
+            return shared
+        try:
+            result = self._with_retries(lambda: _run_with_timeout(fn, self.timeout))
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            self._leave(key, flight)
+
+    def stream(self, key, open_stream):
+        """ Chunks of `open_stream()` through the gateway.
+
+        Only opening the stream (up to its first chunk) is retried: a retry after that
+        would repeat text. Identical calls arriving meanwhile, streamed or not, get the
+        whole text once this stream completes.
+        """
+        flight, shared = self._lead(key)
+        if flight is None:
+            yield shared
+            return
+
+        def first_chunk():
+            chunks = _iter_with_timeout(open_stream, self.timeout)
+            return next(chunks, None), chunks
+
+        received = []
+        try:
+            first, rest = self._with_retries(first_chunk)
+            for chunk in itertools.chain([] if first is None else [first], rest):
+                received.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            flight.set_exception(_Abandoned())
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result("".join(received))
+        finally:
+            self._leave(key, flight)
+
+
+_shared_gateway = None
+_shared_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """ Process-wide gateway instance shared by every app and session. """
+    global _shared_gateway
+    with _shared_gateway_lock:
+        if _shared_gateway is None:
+            _shared_gateway = LLMGateway()
+        return _shared_gateway
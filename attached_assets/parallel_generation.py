@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from export import EXPORT_PREFIX, write_parquet_chunks
+from synthetic import GenerationPlan, block_count, iter_synthetic_chunks
+from worker_processes import main_script_hidden
+
+# 🔹 Worker processes for sharded generation (override through .env)
+DEFAULT_WORKERS = int(os.getenv("DAVIZ_GEN_WORKERS", os.cpu_count() or 1))
+
+
+def shard_blocks(rows, shards):
+    """ Split the blocks covering `rows` into at most `shards` contiguous, near-equal ranges. """
+    blocks = block_count(rows)
+    shards = max(1, min(shards, blocks))
+    bounds = [blocks * i // shards for i in range(shards + 1)]
+    return [range(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+def _write_shard(selected_dependencies, rows, seed, blocks, path):
+    # Runs in a worker process: generate one shard's blocks and write them as one Parquet file
+    return write_parquet_chunks(iter_synthetic_chunks(selected_dependencies, rows, seed, blocks=blocks), path)
+
+
+def generate_parquet_shards(selected_dependencies, rows, seed=None, workers=DEFAULT_WORKERS, directory=None, on_shard=None):
+    """ Generate the synthetic dataset across a process pool, one Parquet part file per shard.
+
+    Shards are contiguous ranges of the same seeded blocks `iter_synthetic_chunks` yields,
+    so reading the parts in name order gives exactly the single-process dataset.
+    `on_shard(rows_done)` is called in this process as shards finish.
+    Returns (part paths in row order, rows written, seconds elapsed).
+    """
+    if not GenerationPlan(selected_dependencies).features:  # Raises DependencyCycleError here rather than in a worker
+        return [], 0, 0.0
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix=f"{EXPORT_PREFIX}parts_")
+    seed = np.random.SeedSequence(seed).entropy  # Every worker must spawn from the same entropy
+    shards = shard_blocks(rows, workers)
+    paths = [os.path.join(directory, f"part-{i:05d}.parquet") for i in range(len(shards))]
+
+    started = time.perf_counter()
+    written = 0
+    # "spawn" avoids forking a parent that runs server threads (e.g. Streamlit)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+        with main_script_hidden():  # Workers start as tasks are submitted
+            futures = [
+                pool.submit(_write_shard, selected_dependencies, rows, seed, blocks, path)
+                for blocks, path in zip(shards, paths)
+            ]
+        for future in as_completed(futures):
+            written += future.result()
+            if on_shard is not None:
+                on_shard(written)
+    return paths, written, time.perf_counter() - started
+
+
+def export_parquet_shards(selected_dependencies, rows, seed=None, workers=DEFAULT_WORKERS, on_shard=None):
+    """ `generate_parquet_shards` bundled into one (uncompressed) zip for download; returns (path, rows, seconds). """
+    directory = tempfile.mkdtemp(prefix=f"{EXPORT_PREFIX}parts_")
+    try:
+        paths, written, seconds = generate_parquet_shards(
+            selected_dependencies, rows, seed, workers, directory=directory, on_shard=on_shard
+        )
+        fd, zip_path = tempfile.mkstemp(suffix=".zip", prefix=EXPORT_PREFIX)
+        os.close(fd)
+        # Parquet parts are already zstd-compressed, so store them as they are
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for path in paths:
+                archive.write(path, arcname=os.path.basename(path))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return zip_path, written, seconds
@@ -0,0 +1,63 @@
+import functools
+import threading
+import time
+
+import streamlit as st
+
+# 🔹 Last measured cost of each cached computation, and the time saved during the current rerun
+_compute_seconds = {}
+_local = threading.local()
+
+
+def _instrument(name, streamlit_cache, cache_kwargs):
+    def decorate(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _local.computed = True
+            return func(*args, **kwargs)
+
+        cached = streamlit_cache(**cache_kwargs)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _local.computed = False
+            started = time.perf_counter()
+            result = cached(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            if _local.computed:
+                _compute_seconds[name] = elapsed
+            else:
+                savings = getattr(_local, "savings", None)
+                if savings is not None:
+                    savings[name] = savings.get(name, 0.0) + max(0.0, _compute_seconds.get(name, 0.0) - elapsed)
+            return result
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorate
+
+
+def cache_data(name, **cache_kwargs):
+    """ `st.cache_data` that also reports how much time each hit saved this rerun. """
+    return _instrument(name, st.cache_data, cache_kwargs)
+
+
+def cache_resource(name, **cache_kwargs):
+    """ `st.cache_resource` (shared, uncopied objects) with the same hit accounting as `cache_data`. """
+    return _instrument(name, st.cache_resource, cache_kwargs)
+
+
+def start_rerun():
+    """ Reset the per-rerun savings; call once at the top of the script. """
+    _local.savings = {}
+
+
+def show_rerun_savings():
+    """ Sidebar summary of the time cached results saved during this rerun. """
+    savings = getattr(_local, "savings", None) or {}
+    total = sum(savings.values())
+    if total > 0:
+        details = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in savings.items())
+        st.sidebar.caption(f"♻️ Caches saved {total * 1000:.0f} ms this rerun ({details})")
+    return savings
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+# 🔹 Saved sessions location (override through .env)
+DEFAULT_SESSION_PATH = os.getenv(
+    "DAVIZ_SESSION_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".daviz_sessions.sqlite3"),
+)
+
+_WHOLE = ""  # Row key of values stored in one piece (lists, sets, flags)
+
+
+def new_session_id():
+    # The id is the only key to a saved session (it travels in the URL), so it must not be guessable
+    return uuid.uuid4().hex
+
+
+def _encode(value):
+    if isinstance(value, (set, frozenset)):
+        value = {"__set__": sorted(value, key=str)}
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _decode(text):
+    value = json.loads(text)
+    if isinstance(value, dict) and set(value) == {"__set__"}:
+        return set(value["__set__"])
+    return value
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LazyEntries(MutableMapping):
+    """ A saved {feature: value} mapping whose values are read from the store on first access.
+
+    Keys are known up front, so membership tests and ordering are free; iterating over
+    items loads every missing value in one query.
+    """
+
+    def __init__(self, store, session_id, name, keys):
+        self._store = store
+        self._session_id = session_id
+        self._name = name
+        self._keys = dict.fromkeys(keys)
+        self._values = {}
+
+    def __contains__(self, key):
+        return key in self._keys  # Answered from the saved keys, without reading the value
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key not in self._values:
+            self._values.update(self._store._load_entries(self._session_id, self._name, [key]))
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        self._keys[key] = None
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        del self._keys[key]
+        self._values.pop(key, None)
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def items(self):
+        missing = [key for key in self._keys if key not in self._values]
+        if missing:
+            self._values.update(self._store._load_entries(self._session_id, self._name, missing))
+        return [(key, self._values[key]) for key in self._keys]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def loaded_items(self):
+        """ Entries read or written so far; the others are unchanged since they were saved. """
+        return [(key, self._values[key]) for key in self._keys if key in self._values]
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class SessionStore:
+    """ SQLite store of app sessions: every state value is saved per feature, so saves only write what changed. """
+
+    def __init__(self, path=DEFAULT_SESSION_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " app TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " session_id TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " PRIMARY KEY (session_id, name, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_app_updated ON sessions(app, updated_at)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe across Streamlit script threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, session_id, app, title, state):
+        """ Save `state` ({name: value}) for a session, writing only entries whose content changed.
+
+        Dict values are stored one row per key; anything else in one row. For
+        LazyEntries only the entries read or written since loading are compared.
+        Returns the number of rows written or deleted.
+        """
+        rows = []  # (name, key, value, digest)
+        present = {}  # name -> keys that still exist (None: every key was compared)
+        for name, value in state.items():
+            if isinstance(value, LazyEntries):
+                items, present[name] = value.loaded_items(), {_encode(key) for key in value}
+            elif isinstance(value, dict):
+                items, present[name] = list(value.items()), None
+            else:
+                encoded = _encode(value)
+                rows.append((name, _WHOLE, encoded, _digest(encoded)))
+                continue
+            for key, item in items:
+                encoded = _encode(item)
+                rows.append((name, _encode(key), encoded, _digest(encoded)))
+
+        now = time.time()
+        with self._connect() as conn:
+            saved = {
+                (name, key): digest
+                for name, key, digest in conn.execute("SELECT name, key, digest FROM entries WHERE session_id = ?", (session_id,))
+            }
+            changed = [(session_id, name, key, value, digest) for name, key, value, digest in rows if saved.get((name, key)) != digest]
+            compared = {(name, key) for name, key, _, _ in rows}
+            removed = [
+                (session_id, name, key) for name, key in saved
+                if name in state and key != _WHOLE and (name, key) not in compared
+                and (present.get(name) is None or key not in present[name])
+            ]
+            # Upsert in place: rowids (and so the saved order of keys) stay stable across saves
+            conn.executemany(
+                "INSERT INTO entries (session_id, name, key, value, digest) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(session_id, name, key) DO UPDATE SET value = excluded.value, digest = excluded.digest",
+                changed,
+            )
+            conn.executemany("DELETE FROM entries WHERE session_id = ? AND name = ? AND key = ?", removed)
+            conn.execute(
+                "INSERT INTO sessions (id, app, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET title = excluded.title, updated_at = excluded.updated_at",
+                (session_id, app, title, now, now),
+            )
+        return len(changed) + len(removed)
+
+    def list_sessions(self, app, ids, limit=20):
+        """ Most recently updated of the given sessions of an app: [{"id", "title", "updated_at", "entries"}].
+
+        The store is shared by every visitor, so callers pass the ids this visitor
+        created or opened; other sessions are never listed.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.id, s.title, s.updated_at, COUNT(e.key) FROM sessions s"
+                " LEFT JOIN entries e ON e.session_id = s.id"
+                " WHERE s.app = ? AND s.id IN (SELECT value FROM json_each(?))"
+                " GROUP BY s.id ORDER BY s.updated_at DESC LIMIT ?",
+                (app, json.dumps(list(ids)), limit),
+            ).fetchall()
+        return [{"id": row[0], "title": row[1], "updated_at": row[2], "entries": row[3]} for row in rows]
+
+    def load(self, session_id, lazy=()):
+        """ A saved session's state, or None if it does not exist.
+
+        Names listed in `lazy` come back as LazyEntries (values read on first access);
+        everything else is loaded immediately.
+        """
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+                return None
+            state = {}
+            lazy_keys = {}
+            for name, key, value in conn.execute(
+                "SELECT name, key, CASE WHEN name IN (SELECT value FROM json_each(?)) THEN NULL ELSE value END"
+                " FROM entries WHERE session_id = ? ORDER BY rowid",
+                (json.dumps(list(lazy)), session_id),
+            ):
+                if name in lazy:
+                    lazy_keys.setdefault(name, []).append(json.loads(key))
+                elif key == _WHOLE:
+                    state[name] = _decode(value)
+                else:
+                    state.setdefault(name, {})[json.loads(key)] = _decode(value)
+        for name in lazy:
+            state[name] = LazyEntries(self, session_id, name, lazy_keys.get(name, []))
+        return state
+
+    def _load_entries(self, session_id, name, keys):
+        encoded = {_encode(key): key for key in keys}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM entries WHERE session_id = ? AND name = ?"
+                " AND key IN (SELECT value FROM json_each(?))",
+                (session_id, name, json.dumps(list(encoded))),
+            ).fetchall()
+        return {encoded[key]: _decode(value) for key, value in rows}
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_store():
+    """ Process-wide store instance shared by every app and session. """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = SessionStore()
+        return _shared_store
@@ -0,0 +1,393 @@
+import itertools
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import get_cache as get_columnar_cache
+from ingest import file_digest
+from worker_processes import main_script_hidden
+
+# 🔹 Rows parsed per chunk when profiling a sheet (override through .env)
+DEFAULT_CHUNK_ROWS = int(os.getenv("DAVIZ_STATS_CHUNK_ROWS", 100_000))
+PREVIEW_ROWS = 5
+QUANTILES = {"q25": 0.25, "median": 0.5, "q75": 0.75}
+
+# 🔹 Pairwise chi-square screening (override through .env)
+DEFAULT_WORKERS = int(os.getenv("DAVIZ_STATS_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_CELLS = 50_000_000  # Pairs × rows from which pairs are spread across processes
+MAX_PAIR_CATEGORIES = 1000  # Wider columns (IDs, free text) would need huge contingency tables
+
+# 🔹 Statistics offered by the app: {label: summary column}
+STATISTICS = {
+    "Mean": "mean",
+    "Median": "median",
+    "Mode": "mode",
+    "Variance": "var",
+    "Standard Deviation": "std",
+}
+
+
+def exact_quantiles(values, quantiles):
+    """ Linearly interpolated quantiles (the pandas and NumPy default) from a single `np.partition`. """
+    n = len(values)
+    if n == 0:
+        return [np.nan] * len(quantiles)
+    positions = [(n - 1) * q for q in quantiles]
+    kth = sorted({int(np.floor(p)) for p in positions} | {int(np.ceil(p)) for p in positions})
+    ordered = np.partition(values, kth)
+    result = []
+    for position in positions:
+        low, high = ordered[int(np.floor(position))], ordered[int(np.ceil(position))]
+        result.append(low + (high - low) * (position - np.floor(position)))
+    return result
+
+
+def _smallest(values):
+    # Ties for the mode resolve to the smallest value, as `Series.mode()[0]` does
+    try:
+        return min(values)
+    except TypeError:
+        return min(values, key=str)
+
+
+def _code_dtype(categories):
+    # Smallest signed integer type holding codes 0..categories-1 and -1 for missing
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class SheetProfile:
+    """ Every statistic of every column, computed once: switching column or statistic is a lookup.
+
+    Text columns also keep their factorized `codes` (-1 for missing) and `categories`,
+    from which contingency tables are built without re-reading the sheet.
+    """
+
+    def __init__(self, summary, preview, rows, numeric_columns, categorical_columns, codes=None, categories=None):
+        self.summary = summary
+        self.preview = preview
+        self.rows = rows
+        self.numeric_columns = numeric_columns
+        self.categorical_columns = categorical_columns
+        self.codes = codes or {}
+        self.categories = categories or {}
+
+    def value(self, column, statistic):
+        """ A statistic (a label of STATISTICS) of a column; NaN where it is undefined (e.g. the mean of text). """
+        return self.summary.at[column, STATISTICS[statistic]]
+
+
+class ColumnProfiler:
+    """ One pass over a sheet's chunks: moments, extremes, quantiles and modes of every column.
+
+    Moments use Chan's pairwise form of Welford's update, vectorized over all numeric
+    columns of a chunk. Non-missing numeric values are kept (8 bytes per cell) so the
+    median and quartiles are exact, from one `np.partition` per column. Text columns
+    keep their codes, which follow first appearance, and value counts accumulated
+    with `np.bincount` over them. Column types are decided from the first chunk; later values
+    that don't parse as numbers in a numeric column count as missing.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.rows = 0
+        self.preview = None
+
+    def _start(self, chunk):
+        self.columns = list(chunk.columns)
+        self.numeric_columns = [
+            col for col in chunk.columns
+            if pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col])
+        ]
+        # Text columns: object dtype, or the string dtype pandas 3 infers for text
+        self.categorical_columns = [col for col in chunk.columns if pd.api.types.is_string_dtype(chunk[col].dtype)]
+        self._integer = [pd.api.types.is_integer_dtype(chunk[col]) for col in self.numeric_columns]
+        p = len(self.numeric_columns)
+        self._count = np.zeros(p)
+        self._mean = np.zeros(p)
+        self._m2 = np.zeros(p)
+        self._min = np.full(p, np.inf)
+        self._max = np.full(p, -np.inf)
+        self._values = [[] for _ in range(p)]
+        self._codes = {col: {} for col in self.categorical_columns}  # {column: {value: code}}
+        self._counts = {col: np.zeros(0, dtype=np.int64) for col in self.categorical_columns}
+        self._chunk_codes = {col: [] for col in self.categorical_columns}
+        self.preview = chunk.head(PREVIEW_ROWS)
+
+    def update(self, chunk):
+        """ Accumulate one DataFrame chunk (same columns as the first one). """
+        if self.columns is None:
+            self._start(chunk)
+        if len(chunk) == 0:
+            return
+
+        if self.numeric_columns:
+            matrix = np.column_stack([
+                pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                for col in self.numeric_columns
+            ])
+            valid = ~np.isnan(matrix)
+            chunk_count = valid.sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                chunk_mean = np.where(chunk_count > 0, np.nansum(matrix, axis=0) / chunk_count, 0.0)
+                chunk_m2 = np.nansum((matrix - chunk_mean) ** 2, axis=0)
+                total = self._count + chunk_count
+                weight = np.where(total > 0, chunk_count / total, 0.0)
+            delta = chunk_mean - self._mean
+            self._mean += delta * weight
+            self._m2 += chunk_m2 + delta * delta * self._count * weight  # δ² · n_a · n_b / n
+            self._count = total
+            self._min = np.minimum(self._min, np.where(valid, matrix, np.inf).min(axis=0))
+            self._max = np.maximum(self._max, np.where(valid, matrix, -np.inf).max(axis=0))
+            for j in range(len(self.numeric_columns)):
+                self._values[j].append(matrix[valid[:, j], j])
+
+        for col in self.categorical_columns:
+            codes, uniques = pd.factorize(chunk[col])
+            mapping = self._codes[col]
+            global_codes = np.array([mapping.setdefault(value, len(mapping)) for value in uniques], dtype=np.int32)
+            chunk_codes = np.where(codes < 0, -1, global_codes[codes] if len(uniques) else codes).astype(np.int32)
+            counts = np.bincount(chunk_codes[chunk_codes >= 0], minlength=len(mapping))
+            counts[:len(self._counts[col])] += self._counts[col]
+            self._counts[col] = counts
+            self._chunk_codes[col].append(chunk_codes)
+
+        self.rows += len(chunk)
+
+    def finish(self):
+        """ The SheetProfile of everything seen; the kept values are released. """
+        if self.columns is None:
+            return SheetProfile(pd.DataFrame(), pd.DataFrame(), 0, [], [])
+
+        summary = {}
+        for j, col in enumerate(self.numeric_columns):
+            values = np.concatenate(self._values[j]) if self._values[j] else np.empty(0)
+            self._values[j] = None
+            n = len(values)
+            entry = {"count": n, "missing": self.rows - n, "unique": 0, "mode": np.nan, "mode_count": 0}
+            entry["mean"] = self._mean[j] if n else np.nan
+            entry["var"] = self._m2[j] / (n - 1) if n > 1 else np.nan
+            entry["std"] = np.sqrt(entry["var"])
+            entry["min"] = self._min[j] if n else np.nan
+            entry["max"] = self._max[j] if n else np.nan
+            entry.update(zip(QUANTILES, exact_quantiles(values, list(QUANTILES.values()))))
+            if n:
+                codes, uniques = pd.factorize(values)  # Hashing, no sort: ties are resolved among the modal values only
+                counts = np.bincount(codes)
+                top = counts.max()
+                entry.update(unique=len(uniques), mode=uniques[counts == top].min(), mode_count=int(top))
+                if self._integer[j]:
+                    entry.update(mode=int(entry["mode"]), min=int(entry["min"]), max=int(entry["max"]))
+            summary[col] = entry
+
+        codes = {}
+        for col in self.categorical_columns:
+            counts = self._counts[col]
+            values = list(self._codes[col])
+            chunks = self._chunk_codes.pop(col)
+            codes[col] = np.concatenate(chunks).astype(_code_dtype(len(values))) if chunks else np.empty(0, dtype=np.int8)
+            n = int(counts.sum())
+            entry = {"count": n, "missing": self.rows - n, "unique": len(values), "mode": np.nan, "mode_count": 0}
+            if n:
+                top = counts.max()
+                entry.update(mode=_smallest([values[i] for i in np.flatnonzero(counts == top)]), mode_count=int(top))
+            summary[col] = entry
+
+        columns = ["count", "missing", "mean", "std", "var", "min", "q25", "median", "q75", "max", "mode", "mode_count", "unique"]
+        frame = pd.DataFrame.from_dict(summary, orient="index").reindex(columns=columns)
+        frame = frame.reindex([col for col in self.columns if col in summary])
+        categories = {col: list(self._codes[col]) for col in self.categorical_columns}
+        return SheetProfile(frame, self.preview, self.rows, self.numeric_columns, self.categorical_columns, codes, categories)
+
+
+def _unique_names(header):
+    # Blank and repeated headers are named the way `pd.read_excel` names them
+    names, seen = [], {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else name
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _iter_xlsx_chunks(file_obj, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)  # Streams rows instead of loading the sheet
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _unique_names(header)
+        batch, blank_run, emitted = [], [], False
+        for row in rows:
+            if all(cell is None for cell in row):
+                blank_run.append(row)  # Kept only if data follows: trailing blank rows are dropped
+                continue
+            batch.extend(blank_run)
+            blank_run = []
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=columns)
+                batch, emitted = [], True
+        if batch or not emitted:  # A header-only sheet still reports its columns
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_sheet_chunks(file_obj, file_name, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ DataFrame chunks of the first sheet of an .xlsx workbook, a CSV file or (in one piece) an .xls workbook. """
+    file_obj.seek(0)
+    name = file_name.lower()
+    if name.endswith(".csv"):
+        yield from pd.read_csv(file_obj, chunksize=chunk_rows)
+    elif name.endswith((".xlsx", ".xlsm")):
+        yield from _iter_xlsx_chunks(file_obj, chunk_rows)
+    else:
+        yield pd.read_excel(file_obj)  # Legacy .xls files cannot be streamed
+
+
+def profile_chunks(chunks):
+    """ Profile every column of a sheet in one pass over its DataFrame chunks. """
+    profiler = ColumnProfiler()
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.finish()
+
+
+def profile_file(file_obj, file_name, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ Profile every column of a sheet in one pass over its chunks; only one chunk is in memory at a time.
+
+    The sheet goes through the columnar cache first, which settles each column's type
+    over the whole file: a column that turns to text after its first chunk is
+    profiled as text throughout.
+    """
+    digest = file_digest(file_obj)
+    cache = get_columnar_cache()
+    cache.ensure(digest, lambda: iter_sheet_chunks(file_obj, file_name, chunk_rows))
+    return profile_chunks(cache.iter_chunks(digest, chunk_rows=chunk_rows))
+
+
+def contingency_table(a, b, categories_a, categories_b):
+    """ Observed counts of two code arrays (-1: missing) from one `np.bincount` over combined codes.
+
+    Rows missing either value are left out and categories never observed together
+    with a value of the other column are dropped, as `pd.crosstab` does.
+    """
+    combined = a.astype(np.int64) * categories_b + b
+    if (a < 0).any() or (b < 0).any():
+        combined = combined[(a >= 0) & (b >= 0)]
+    table = np.bincount(combined, minlength=categories_a * categories_b).reshape(categories_a, categories_b)
+    return table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+
+
+def _chi_square_statistic(table):
+    # (chi², degrees of freedom, Cramér's V, n); the p-value is left to the caller
+    n = int(table.sum())
+    rows, cols = table.shape
+    if rows < 2 or cols < 2:
+        return 0.0, 0, np.nan, n
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    uncorrected = ((table - expected) ** 2 / expected).sum()
+    dof = (rows - 1) * (cols - 1)
+    chi2 = uncorrected
+    if dof == 1:
+        # Yates' continuity correction, exactly as scipy.stats.chi2_contingency applies it
+        diff = expected - table
+        corrected = table + np.minimum(0.5, np.abs(diff)) * np.sign(diff)
+        chi2 = ((corrected - expected) ** 2 / expected).sum()
+    return float(chi2), dof, float(np.sqrt(uncorrected / (n * (min(rows, cols) - 1)))), n
+
+
+def _p_values(chi2, dof):
+    from scipy import stats  # Imported on the first test: it costs more than everything else the app loads
+
+    dof = np.asarray(dof)
+    return np.where(dof > 0, stats.chi2.sf(chi2, np.maximum(dof, 1)), 1.0)
+
+
+def chi_square(table):
+    """ (chi², p-value, degrees of freedom, Cramér's V, n) of a contingency table.
+
+    Chi² and p follow `scipy.stats.chi2_contingency` (Yates' correction for 2 × 2);
+    Cramér's V uses the uncorrected statistic. A table with a single row or column
+    shows no association: chi² 0, p 1 and V undefined.
+    """
+    chi2, dof, cramers_v, n = _chi_square_statistic(table)
+    return chi2, float(_p_values(chi2, dof)), dof, cramers_v, n
+
+
+def _pair_rows(codes, categories, pairs):
+    rows = []
+    for i, group in itertools.groupby(pairs, key=lambda pair: pair[0]):
+        a = codes[i].astype(np.int64)  # Widened once for all pairs with this column first
+        for _, j in group:
+            rows.append((i, j, *_chi_square_statistic(contingency_table(a, codes[j], categories[i], categories[j]))))
+    return rows
+
+
+def _pair_rows_from_file(path, categories, pairs):
+    # Runs in a worker process: the codes matrix is memory-mapped, not copied per worker
+    return _pair_rows(np.load(path, mmap_mode="r"), categories, pairs)
+
+
+def pairwise_chi_square(profile, columns=None, workers=DEFAULT_WORKERS):
+    """ Chi-square test and Cramér's V for every pair of text columns of a profile.
+
+    Each column is factorized once (by the profiler); every pair costs one bincount
+    over the rows, and all p-values come from one vectorized call. Columns with one
+    category or more than MAX_PAIR_CATEGORIES are skipped. Large screens
+    (pairs × rows ≥ PARALLEL_MIN_CELLS) are split across a process pool.
+    Returns (one row per pair, strongest association first; skipped columns).
+    """
+    columns = list(columns if columns is not None else profile.categorical_columns)
+    kept = [col for col in columns if 1 < len(profile.categories[col]) <= MAX_PAIR_CATEGORIES]
+    skipped = [col for col in columns if col not in kept]
+    categories = [len(profile.categories[col]) for col in kept]
+    matrix = np.stack([profile.codes[col] for col in kept]).astype(_code_dtype(max(categories, default=1))) if kept else None
+    pairs = list(itertools.combinations(range(len(kept)), 2))
+
+    if workers > 1 and len(pairs) > 1 and len(pairs) * profile.rows >= PARALLEL_MIN_CELLS:
+        # Contiguous blocks keep each column's widened codes reused within a worker
+        block_count = min(len(pairs), workers * 4)
+        bounds = [len(pairs) * k // block_count for k in range(block_count + 1)]
+        blocks = [pairs[start:stop] for start, stop in zip(bounds, bounds[1:])]
+        with tempfile.TemporaryDirectory(prefix="daviz_pairs_") as directory:
+            path = os.path.join(directory, "codes.npy")
+            np.save(path, matrix)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(workers, len(blocks)), mp_context=context) as pool:
+                with main_script_hidden():
+                    futures = [pool.submit(_pair_rows_from_file, path, categories, block) for block in blocks]
+                rows = [row for future in futures for row in future.result()]
+    else:
+        rows = _pair_rows(matrix, categories, pairs)
+
+    results = pd.DataFrame(rows, columns=["a", "b", "chi2", "dof", "cramers_v", "n"])
+    results.insert(0, "column_a", [kept[i] for i in results.pop("a")])
+    results.insert(1, "column_b", [kept[j] for j in results.pop("b")])
+    results.insert(3, "p_value", _p_values(results["chi2"].to_numpy(), results["dof"].to_numpy()) if len(results) else [])
+    return results.sort_values("cramers_v", ascending=False, kind="stable", ignore_index=True), skipped
+
+
+def association_matrix(results):
+    """ Symmetric Cramér's V matrix of `pairwise_chi_square` results (1 on the diagonal). """
+    columns = list(dict.fromkeys([*results["column_a"], *results["column_b"]]))
+    position = {col: i for i, col in enumerate(columns)}
+    a = results["column_a"].map(position).to_numpy(dtype=np.int64)
+    b = results["column_b"].map(position).to_numpy(dtype=np.int64)
+    values = np.eye(len(columns))
+    values[a, b] = values[b, a] = results["cramers_v"].to_numpy()
+    return pd.DataFrame(values, index=columns, columns=columns)
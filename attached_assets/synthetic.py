@@ -0,0 +1,250 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROWS = 100
+CHUNK_ROWS = 100_000  # Rows generated (and exported) per block
+DECAY_BASE = 1.5  # Influence of a feature decays by this factor per level of depth
+
+
+class DependencyCycleError(ValueError):
+    """ The selected dependencies loop back on themselves, so no generation order exists. """
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__("Dependency cycle: " + " → ".join(map(str, cycle)))
+
+
+def build_dag(selected_dependencies):
+    """ Features in depth-first discovery order (the dataset's column order) and deduplicated child lists. """
+    children = {}
+    order = []
+    stack = list(reversed(list(selected_dependencies)))
+    while stack:
+        feature = stack.pop()
+        if feature in children:
+            continue
+        children[feature] = list(dict.fromkeys(
+            dep for dep in selected_dependencies.get(feature, []) if dep != feature
+        ))
+        order.append(feature)
+        stack.extend(reversed(children[feature]))
+    return order, children
+
+
+def find_cycle(children):
+    """ One dependency cycle as a list of features (first feature repeated at the end), or None. """
+    state = {}  # feature -> 1 while on the DFS path, 2 once finished
+    for start in children:
+        if start in state:
+            continue
+        path = [start]
+        iterators = [iter(children[start])]
+        state[start] = 1
+        while iterators:
+            child = next(iterators[-1], None)
+            if child is None:
+                state[path.pop()] = 2
+                iterators.pop()
+            elif state.get(child) == 1:
+                return path[path.index(child):] + [child]
+            elif child not in state:
+                state[child] = 1
+                path.append(child)
+                iterators.append(iter(children[child]))
+    return None
+
+
+def topological_layers(order, children):
+    """ Kahn's algorithm: layer k holds the features whose parents all sit in earlier layers. """
+    in_degree = dict.fromkeys(order, 0)
+    for feature in order:
+        for child in children[feature]:
+            in_degree[child] += 1
+
+    layer = [feature for feature in order if in_degree[feature] == 0]
+    layers = []
+    placed = 0
+    while layer:
+        layers.append(layer)
+        placed += len(layer)
+        next_layer = []
+        for feature in layer:
+            for child in children[feature]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    next_layer.append(child)
+        layer = next_layer
+
+    if placed < len(order):
+        raise DependencyCycleError(find_cycle(children))
+    return layers
+
+
+def compute_depths(selected_dependencies):
+    """ Depth of every feature: 1 for features nothing depends on, then one BFS outwards. """
+    order, children = build_dag(selected_dependencies)
+    has_parent = {child for feature in order for child in children[feature]}
+    depths = {feature: 1 for feature in order if feature not in has_parent}
+    queue = deque(depths)
+    while queue:
+        feature = queue.popleft()
+        for child in children[feature]:
+            if child not in depths:
+                depths[child] = depths[feature] + 1
+                queue.append(child)
+    return {feature: depths[feature] for feature in order if feature in depths}
+
+
+class GenerationPlan:
+    """ Compiled propagation plan for a dependency DAG.
+
+    Built once per tree: features are topologically layered, and every layer becomes
+    one vectorized step in which each child takes the mean of its parents' values,
+    scaled by `1 / 1.5 ** (depth - 1)`, plus noise. Generation is O(edges × rows).
+    Raises DependencyCycleError when the selections form a cycle.
+    """
+
+    def __init__(self, selected_dependencies):
+        order, children = build_dag(selected_dependencies)
+        layers = topological_layers(order, children)
+        feature_levels = compute_depths(selected_dependencies)
+
+        self.features = order
+        self.feature_levels = feature_levels
+        column = {feature: i for i, feature in enumerate(order)}
+        self.weights = np.array([1.0 / DECAY_BASE ** (feature_levels[f] - 1) for f in order])
+
+        parents = {feature: [] for feature in order}
+        for feature in order:
+            for child in children[feature]:
+                parents[child].append(column[feature])
+
+        # One step per non-root layer: parent columns grouped by child for np.add.reduceat
+        self.steps = []
+        for layer in layers[1:]:
+            child_columns = np.array([column[f] for f in layer])
+            parent_columns = np.concatenate([parents[f] for f in layer])
+            starts = np.cumsum([0] + [len(parents[f]) for f in layer[:-1]])
+            scale = self.weights[child_columns] / np.array([len(parents[f]) for f in layer])
+            self.steps.append((child_columns, parent_columns, starts, scale))
+
+        # First feature is the target variable: the decayed sum of its direct dependencies
+        target_children = children[order[0]] if order else []
+        self.relevant = np.array([column[f] for f in target_children], dtype=np.int64)
+        derived = {c for step in self.steps for c in step[0].tolist()} | ({0} if target_children else set())
+        self.integer_columns = [f for i, f in enumerate(order) if i not in derived]
+
+    def generate(self, rows, rng):
+        """ One block of rows as a DataFrame. """
+        values = rng.integers(50, 101, size=(rows, len(self.features))).astype(np.float64)
+
+        for child_columns, parent_columns, starts, scale in self.steps:
+            parent_sums = np.add.reduceat(values[:, parent_columns], starts, axis=1)
+            noise = rng.integers(-5, 6, size=(rows, len(child_columns)), dtype=np.int8)
+            values[:, child_columns] = np.clip(parent_sums * scale + noise, 0, 100)
+
+        if len(self.relevant):
+            values[:, 0] = values[:, self.relevant] @ self.weights[self.relevant]
+
+        df = pd.DataFrame(values, columns=self.features)
+        return df.astype({feature: np.int64 for feature in self.integer_columns})
+
+
+def block_count(rows):
+    """ Number of CHUNK_ROWS blocks covering `rows`. """
+    return -(-rows // CHUNK_ROWS)
+
+
+def iter_synthetic_chunks(selected_dependencies, rows=DEFAULT_ROWS, seed=None, blocks=None):
+    """ Yield the synthetic dataset in blocks of at most CHUNK_ROWS rows.
+
+    Block k draws from the k-th stream spawned from `seed`, so concatenating the
+    blocks always gives the same frame for the same seed, however it is consumed.
+    `blocks` restricts the output to a range of block indices (one shard of the rows);
+    pass an integer seed (e.g. `SeedSequence().entropy`) when shards run in separate processes.
+    """
+    plan = GenerationPlan(selected_dependencies)
+    if not plan.features:
+        return
+    streams = np.random.SeedSequence(seed).spawn(block_count(rows))
+    for k in range(len(streams)) if blocks is None else blocks:
+        start = k * CHUNK_ROWS
+        yield plan.generate(min(CHUNK_ROWS, rows - start), np.random.default_rng(streams[k]))
+
+
+def generate_synthetic_dataset(selected_dependencies, rows=DEFAULT_ROWS, seed=None):
+    """ Synthetic dataset for the selected dependency tree, fully in memory.
+
+    Every feature starts from a uniform integer in [50, 100]; children are then derived
+    layer by layer from their parents (see GenerationPlan), clipped to [0, 100], and the
+    first root becomes the decayed sum of its direct dependencies. The same seed always
+    yields the same frame.
+    """
+    chunks = list(iter_synthetic_chunks(selected_dependencies, rows, seed))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def _standard_scores(series):
+    """ Column as zero-mean, unit-variance float scores (categories by code, missing values at 0). """
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        codes = pd.factorize(series)[0].astype(np.float64)
+        values = np.where(codes < 0, np.nan, codes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = (values - np.nanmean(values)) / np.nanstd(values)
+    return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def synthesize_columns(df, dependencies, new_features, strength=0.6, seed=None):
+    """ Values for features that are not columns of `df`, conditioned on their parents.
+
+    A feature's parents are the features whose entry in `dependencies` lists it (existing
+    columns or other new features). Each new feature gets a latent normal score
+    `strength * parents + sqrt(1 - strength²) * noise`, where `parents` is the standardized
+    mean of its parents' scores, and its value is the score's rank mapped to (0, 1).
+    This keeps the uniform marginals of independent noise while tracking the parents.
+    All columns come from one noise draw and are returned as a single frame.
+    """
+    new_features = [f for f in dict.fromkeys(new_features) if f not in df.columns]
+    if not new_features:
+        return pd.DataFrame(index=df.index)
+
+    parents = {feature: [] for feature in new_features}
+    for parent, children in dependencies.items():
+        for child in children:
+            if child in parents and child != parent and (parent in df.columns or parent in parents) and parent not in parents[child]:
+                parents[child].append(parent)
+
+    # New features that depend on other new features must come after them
+    children = {feature: [] for feature in new_features}
+    for child, feature_parents in parents.items():
+        for parent in feature_parents:
+            if parent in children:
+                children[parent].append(child)
+    order = [feature for layer in topological_layers(new_features, children) for feature in layer]
+
+    rows = len(df)
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((rows, len(new_features)))
+    noise_column = {feature: i for i, feature in enumerate(new_features)}
+    scores = {}  # Standardized scores of parents, existing and new
+    values = {}
+    for feature in order:
+        latent = noise[:, noise_column[feature]]
+        if parents[feature]:
+            for parent in parents[feature]:
+                if parent not in scores:
+                    scores[parent] = _standard_scores(df[parent])
+            combined = np.mean([scores[parent] for parent in parents[feature]], axis=0)
+            spread = combined.std()
+            if spread > 0:
+                latent = strength * (combined - combined.mean()) / spread + np.sqrt(1 - strength ** 2) * latent
+        scores[feature] = (latent - latent.mean()) / (latent.std() or 1.0)
+        values[feature] = (np.argsort(np.argsort(latent, kind="stable"), kind="stable") + 0.5) / rows
+
+    return pd.DataFrame({feature: values[feature] for feature in new_features}, index=df.index)
@@ -0,0 +1,26 @@
+from engine import build_dependency_entry, clean_feature_name, feature_graph_document, parse_feature_line
+from graph_io import document_reasons
+
+
+def test_parse_feature_line_keeps_parentheses_in_bold_names():
+    assert parse_feature_line("* **Credit Score** – (Measures risk)") == ("Credit Score", "Measures risk")
+    assert parse_feature_line("* **Cost (USD)** – (Spend in dollars)") == ("Cost (USD)", "Spend in dollars")
+    assert parse_feature_line("*   **Income** (Paid yearly (gross))") == ("Income", "Paid yearly (gross)")
+    assert parse_feature_line("plain text") is None
+
+
+def test_clean_feature_name_only_drops_the_context():
+    assert clean_feature_name("Cost (USD) (for Budget (for AI recruiter agent))") == "Cost (USD)"
+    assert clean_feature_name("Cost (EUR) (for Budget)") == "Cost (EUR)"
+
+
+def test_names_sharing_a_parenthesized_prefix_keep_their_own_explanations():
+    entry, explanations = build_dependency_entry(
+        "Budget", [("Cost (USD)", "Spend in dollars"), ("Cost (EUR)", "Spend in euros")], pad_to=0
+    )
+    selected = {"Budget": ["Cost (USD)", "Cost (EUR)"]}
+    document = feature_graph_document(selected, {"Budget": entry}, {"Budget": explanations})
+    assert document_reasons(document) == {
+        ("Budget", "Cost (USD)"): "Spend in dollars",
+        ("Budget", "Cost (EUR)"): "Spend in euros",
+    }
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from graph_io import GRAPH_DOCUMENT_FORMAT, GRAPH_FORMATS, build_graph_document, load_graph_document
+
+
+def saved_json(**changes):
+    document = {
+        "format": GRAPH_DOCUMENT_FORMAT,
+        "version": 1,
+        "nodes": [{"id": "target", "level": 0}, {"id": "cause", "level": 1}],
+        "edges": [{"source": "target", "target": "cause"}],
+        "state": {},
+    }
+    document.update(changes)
+    return json.dumps(document).encode("utf-8")
+
+
+@pytest.mark.parametrize("label", list(GRAPH_FORMATS))
+def test_round_trip(label):
+    suffix, _, write = GRAPH_FORMATS[label]
+    document = build_graph_document({"target": ["cause"], "cause": []}, {("target", "cause"): "because"})
+    loaded = load_graph_document(write(document), f"graph{suffix}")
+    assert loaded["edges"] == [{"source": "target", "target": "cause", "reason": "because"}]
+
+
+@pytest.mark.parametrize("data", [
+    saved_json(nodes=[{"id": [1], "level": 0}]),  # Unhashable id
+    saved_json(nodes=[{"id": 7, "level": 0}]),
+    saved_json(nodes=[{"level": 0}]),
+    saved_json(nodes=[{"id": "target", "level": "x"}]),
+    saved_json(nodes=[{"id": "target", "level": 1.5}]),
+    saved_json(nodes=[{"id": "target", "level": True}]),
+    saved_json(edges=[{"source": ["target"], "target": "cause"}]),
+    saved_json(edges=[{"source": "target", "target": {"id": "cause"}}]),
+    saved_json(edges=[{"source": "target"}]),
+    saved_json(version="1"),
+    b"[1, 2]",
+])
+def test_malformed_documents_raise_value_error(data):
+    with pytest.raises(ValueError):
+        load_graph_document(data, "graph.json")
+
+
+def test_missing_levels_are_allowed():
+    loaded = load_graph_document(saved_json(nodes=[{"id": "target", "level": None}, {"id": "cause"}]), "graph.json")
+    assert [node["id"] for node in loaded["nodes"]] == ["target", "cause"]
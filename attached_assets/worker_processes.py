@@ -0,0 +1,23 @@
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+_main_swap_lock = threading.Lock()
+
+
+@contextmanager
+def main_script_hidden():
+    """ Start "spawn" workers without them re-running the main script.
+
+    Spawned children import the parent's `__main__` by file path; under Streamlit that
+    is the app script itself, so it is swapped for an empty module while workers start.
+    The swap is serialized, so pools started from several threads restore the real module.
+    """
+    with _main_swap_lock:
+        main_module = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main_module